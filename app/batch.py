@@ -0,0 +1,182 @@
+# app/batch.py
+"""
+Bulk mode: push a JSONL file of prompts through the Responses runner in ONE
+process, with bounded concurrency, rate-limit backoff and resumable output.
+
+    python -m app.batch prompts.jsonl --out results.jsonl --concurrency 16
+
+Each input line is a JSON object with a prompt in "prompt" (or "body"), and
+optionally "id" / "request_id", "session", "structured" and "model".
+Each output line is {"id", "ok", "output_text", "error", "attempts", "elapsed"}.
+Re-running with the same --out skips ids that already succeeded.
+"""
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from typing import Optional
+
+import typer
+from dotenv import load_dotenv
+from rich.console import Console
+
+console = Console()
+
+app = typer.Typer(help="Run many prompts through the Responses runner concurrently.")
+
+
+def _read_prompts(path: Path) -> list:
+    jobs = []
+    with path.open(encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            prompt = row.get("prompt") or row.get("body")
+            if not prompt:
+                console.print(f"[yellow]Line {lineno}: no 'prompt'/'body', skipped[/yellow]")
+                continue
+            job_id = row.get("id", row.get("request_id"))
+            jobs.append({
+                "id": str(lineno if job_id is None else job_id),
+                "prompt": prompt,
+                "session": row.get("session"),
+                "structured": row.get("structured"),
+                "model": row.get("model"),
+            })
+    return jobs
+
+
+def _done_ids(out_path: Path) -> set:
+    """Ids that already have a successful result line (for resuming)."""
+    done = set()
+    if not out_path.exists():
+        return done
+    with out_path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            if row.get("ok"):
+                done.add(str(row.get("id")))
+    return done
+
+
+def _retry_after(err: Exception) -> Optional[float]:
+    response = getattr(err, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except Exception:
+        return None
+
+
+async def _run_job(job: dict, client, model: str, max_retries: int, base_delay: float) -> dict:
+    import openai
+
+    from .runner_responses import run_once_async
+
+    retryable = (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    )
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            text = await run_once_async(
+                job["prompt"],
+                job["model"] or model,
+                session=job["session"],
+                structured=job["structured"],
+                client=client,
+            )
+            return {"id": job["id"], "ok": True, "output_text": text, "error": None,
+                    "attempts": attempt, "elapsed": round(time.perf_counter() - started, 3)}
+        except retryable as e:
+            if attempt > max_retries:
+                error = f"{e!r}"
+            else:
+                # Honour Retry-After if the API sent it, else exponential backoff with full jitter
+                delay = _retry_after(e) or random.uniform(0, base_delay * 2 ** (attempt - 1))
+                await asyncio.sleep(delay)
+                continue
+        except Exception as e:
+            error = f"{e!r}"
+        return {"id": job["id"], "ok": False, "output_text": None, "error": error,
+                "attempts": attempt, "elapsed": round(time.perf_counter() - started, 3)}
+
+
+async def run_batch(
+    in_path: Path,
+    out_path: Path,
+    model: str = "gpt-4o-mini",
+    concurrency: int = 8,
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+) -> dict:
+    """Run every pending job in `in_path`, appending one result per line to `out_path`."""
+    from openai import AsyncOpenAI
+
+    from .response_cache import client_kwargs
+
+    done = _done_ids(out_path)
+    jobs = [j for j in _read_prompts(in_path) if j["id"] not in done]
+    stats = {"skipped": len(done), "ok": 0, "failed": 0}
+    if not jobs:
+        return stats
+
+    # One client (and connection pool) for the whole batch; retries are ours
+    client = AsyncOpenAI(max_retries=0, **client_kwargs())
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    with out_path.open("a", encoding="utf-8") as out:
+        if out.tell() and not out_path.read_bytes().endswith(b"\n"):
+            out.write("\n")  # start fresh after a torn line from an interrupted run
+
+        async def worker() -> None:
+            while True:
+                try:
+                    job = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await _run_job(job, client, model, max_retries, base_delay)
+                # Single event-loop thread: whole-line writes never interleave
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                stats["ok" if result["ok"] else "failed"] += 1
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        finally:
+            await client.close()
+    return stats
+
+
+@app.command()
+def main(
+    in_path: Path = typer.Argument(..., exists=True, dir_okay=False, help="JSONL file of prompts."),
+    out: Path = typer.Option(Path("results.jsonl"), "--out", "-o", help="JSONL results file (appended)."),
+    model: str = typer.Option("gpt-4o-mini", help="Default model for lines without 'model'."),
+    concurrency: int = typer.Option(8, help="Max prompts in flight at once."),
+    max_retries: int = typer.Option(5, help="Retries per prompt on rate limits / transient errors."),
+    base_delay: float = typer.Option(1.0, help="Base backoff delay in seconds."),
+):
+    """Run a JSONL file of prompts and write one result per line."""
+    load_dotenv()
+    stats = asyncio.run(run_batch(in_path, out, model, concurrency, max_retries, base_delay))
+    console.print(
+        f"[bold]Batch done[/bold]: ok={stats['ok']} failed={stats['failed']} "
+        f"skipped(already done)={stats['skipped']} → {out}"
+    )
+
+
+if __name__ == "__main__":
+    app()
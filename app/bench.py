@@ -0,0 +1,272 @@
+# app/bench.py
+"""
+Benchmark the orchestration code against local mock servers (no API key,
+no network): the mock Responses API and the timeapi.io stub from
+app/mock_api.py answer with a fixed latency, so what varies between runs is
+the runner itself — request building, tool dispatch, session I/O, history
+trimming.
+
+    python -m app.bench --iterations 50 --latency 0.02 --json bench.json
+    python -m app.bench --baseline bench.json --max-regression 0.2   # exit 1 on regression
+
+Scenarios: no_tools, single_tool (get_time over HTTP), many_tools (9 calls in
+two rounds), long_session (600-item history), long_session_chain (the same,
+chained with previous_response_id), structured (currency text.format),
+stream (many_tools, streamed) and batch (app.batch over the async runner).
+Each reports p50/p95 latency per prompt, throughput and peak traced memory.
+"""
+import asyncio
+import gc
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from .mock_api import MockResponsesServer, MockScript, MockTimeServer
+
+console = Console()
+
+app = typer.Typer(help="Benchmark the Responses runner against local mock servers.")
+
+CITIES = ["Stockholm", "Oslo", "Göteborg", "Malmo", "Stokholm"]
+PAIRS = [("USD", "SEK"), ("EUR", "NOK"), ("GBP", "SEK"), ("NOK", "USD")]
+
+SCENARIOS = {
+    "no_tools": dict(rounds=[]),
+    "single_tool": dict(rounds=[[("get_time", {"timezone": "Europe/Stockholm"})]]),
+    "many_tools": dict(rounds=[
+        [("get_weather", {"city": c, "unit": "c"}) for c in CITIES]
+        + [("get_currency_rate", {"base": b, "quote": q}) for b, q in PAIRS[:2]],
+        [("get_weather_batch", {"requests": [{"city": c, "unit": "f"} for c in CITIES]}),
+         ("convert_currency_batch", {"items": [{"base": b, "quote": q, "amount": 100} for b, q in PAIRS]})],
+    ]),
+    "long_session": dict(rounds=[[("get_currency_rate", {"base": "USD", "quote": "SEK"})]], history=600),
+    "long_session_chain": dict(rounds="long_session", history=600, chain=True),
+    "structured": dict(rounds=[[("get_currency_rate", {"base": "USD", "quote": "SEK"})]], structured="currency"),
+    "stream": dict(rounds="many_tools", stream=True),
+    "batch": dict(rounds="many_tools", batch=True),
+}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def _seed_session(name: str, n_items: int) -> None:
+    """A long history of finished tool-using turns."""
+    from .session_store import save_session
+
+    items = []
+    while len(items) < n_items:
+        i = len(items)
+        items += [
+            {"role": "user", "content": f"How many SEK is {i} USD today, and what's the weather in Oslo?"},
+            {"type": "function_call", "name": "get_currency_rate", "call_id": f"old_{i}",
+             "arguments": json.dumps({"base": "USD", "quote": "SEK"})},
+            {"type": "function_call_output", "call_id": f"old_{i}",
+             "output": json.dumps({"ok": True, "base": "USD", "quote": "SEK", "rate": 10.5, "note": "x" * 200})},
+            {"role": "assistant", "content": f"{i} USD is about {i * 10.5:.2f} SEK. " + "Details. " * 20},
+        ]
+    save_session(name, items[:n_items])
+
+
+def _measure(fn: Callable[[], None], iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - started
+
+    # One extra, traced run for memory (tracing slows everything, so it isn't timed)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "n": iterations,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "throughput_per_s": iterations / wall if wall else 0.0,
+        "peak_mem_kb": peak / 1024,
+    }
+
+
+def _measure_batch(iterations: int, concurrency: int) -> dict:
+    from .batch import run_batch
+
+    def once(traced: bool) -> tuple:
+        with tempfile.TemporaryDirectory() as tmp:
+            in_path, out_path = Path(tmp, "in.jsonl"), Path(tmp, "out.jsonl")
+            in_path.write_text(
+                "".join(json.dumps({"id": i, "prompt": f"Weather and FX, please ({i})"}) + "\n" for i in range(iterations)),
+                encoding="utf-8",
+            )
+            if traced:
+                tracemalloc.start()
+            started = time.perf_counter()
+            stats = asyncio.run(run_batch(in_path, out_path, concurrency=concurrency, max_retries=0))
+            wall = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if traced else 0
+            tracemalloc.stop()
+            rows = [json.loads(line) for line in out_path.read_text(encoding="utf-8").splitlines()]
+        if stats["failed"]:
+            raise RuntimeError(f"batch scenario: {stats['failed']} prompts failed, e.g. {rows[0].get('error')}")
+        return rows, wall, peak
+
+    rows, wall, _ = once(traced=False)
+    _, _, peak = once(traced=True)
+    latencies = [r["elapsed"] for r in rows]
+    return {
+        "n": len(rows),
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "throughput_per_s": len(rows) / wall if wall else 0.0,
+        "peak_mem_kb": peak / 1024,
+    }
+
+
+def run_scenarios(
+    names: List[str],
+    iterations: int = 30,
+    warmup: int = 3,
+    latency: float = 0.0,
+    tool_latency: float = 0.0,
+    concurrency: int = 8,
+) -> dict:
+    """Run the named scenarios against fresh mock servers; returns {name: metrics}."""
+    api = MockResponsesServer(latency=latency).start()
+    clock = MockTimeServer(latency=tool_latency).start()
+    tmp = tempfile.TemporaryDirectory()
+    env = {
+        "OPENAI_BASE_URL": api.base_url,
+        "OPENAI_API_KEY": "mock",
+        "TIMEAPI_BASE_URL": clock.url,
+        "TIME_SOURCE": "http",
+        "SESSION_DIR": tmp.name,
+        "RESPONSES_CACHE": "passthrough",
+    }
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+
+    from . import runner_responses
+    from .tools import TOOL_CACHE
+
+    runner_responses.console.quiet = True  # measure orchestration, not terminal rendering
+    results = {}
+    try:
+        for name in names:
+            cfg = SCENARIOS[name]
+            rounds = cfg["rounds"]
+            api.script = MockScript(SCENARIOS[rounds]["rounds"] if isinstance(rounds, str) else rounds)
+            session = None
+            if cfg.get("history"):
+                session = f"bench_{name}"
+                _seed_session(session, cfg["history"])
+
+            def once() -> None:
+                TOOL_CACHE.clear()  # every iteration pays for its tools
+                runner_responses.run_once(
+                    f"Benchmark prompt for {name}",
+                    session=session,
+                    structured=cfg.get("structured"),
+                    stream=cfg.get("stream", False),
+                    chain=cfg.get("chain", False),
+                )
+
+            before = api.requests
+            if cfg.get("batch"):
+                results[name] = _measure_batch(iterations, concurrency)
+                runs = 2 * iterations
+            else:
+                results[name] = _measure(once, iterations, warmup)
+                runs = warmup + iterations + 1
+            results[name]["calls_per_prompt"] = (api.requests - before) / runs
+    finally:
+        runner_responses.console.quiet = False
+        api.stop()
+        clock.stop()
+        tmp.cleanup()
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    return results
+
+
+def _print(results: dict, baseline: Optional[dict]) -> None:
+    table = Table(title="Runner benchmark (mock servers)")
+    for col in ("scenario", "n", "p50 ms", "p95 ms", "mean ms", "prompts/s", "peak KiB", "calls/prompt"):
+        table.add_column(col, justify="left" if col == "scenario" else "right")
+    for name, r in results.items():
+        p50 = f"{r['p50_ms']:.1f}"
+        if baseline and name in baseline:
+            delta = r["p50_ms"] / baseline[name]["p50_ms"] - 1 if baseline[name]["p50_ms"] else 0.0
+            colour = "red" if delta > 0.05 else "green" if delta < -0.05 else "dim"
+            p50 += f" [{colour}]({delta:+.0%})[/{colour}]"
+        table.add_row(
+            name, str(r["n"]), p50, f"{r['p95_ms']:.1f}", f"{r['mean_ms']:.1f}",
+            f"{r['throughput_per_s']:.1f}", f"{r['peak_mem_kb']:.0f}", f"{r['calls_per_prompt']:.1f}",
+        )
+    console.print(table)
+
+
+@app.command()
+def main(
+    scenario: Optional[List[str]] = typer.Option(
+        None, "--scenario", help=f"Scenario to run (repeatable; default all): {', '.join(SCENARIOS)}."
+    ),
+    iterations: int = typer.Option(30, help="Timed prompts per scenario."),
+    warmup: int = typer.Option(3, help="Untimed prompts per scenario before measuring."),
+    latency: float = typer.Option(0.0, help="Mock model latency per call, in seconds."),
+    tool_latency: float = typer.Option(0.0, help="Latency of the stub tool servers, in seconds."),
+    concurrency: int = typer.Option(8, help="Prompts in flight in the batch scenario."),
+    json_out: Optional[Path] = typer.Option(None, "--json", help="Write the results as JSON (a future --baseline)."),
+    baseline: Optional[Path] = typer.Option(None, exists=True, dir_okay=False, help="Earlier --json results to compare p50 against."),
+    max_regression: float = typer.Option(0.0, help="With --baseline: exit 1 if any p50 grows by more than this fraction (0 = report only)."),
+):
+    """Run the scenarios and print p50/p95 latency, throughput and memory."""
+    names = scenario or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise typer.BadParameter(f"Unknown scenario(s) {unknown}; choose from {list(SCENARIOS)}")
+
+    results = run_scenarios(names, iterations, warmup, latency, tool_latency, concurrency)
+    base = json.loads(baseline.read_text(encoding="utf-8")) if baseline else None
+    _print(results, base)
+    if json_out:
+        json_out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if base and max_regression:
+        worse = [
+            n for n, r in results.items()
+            if n in base and base[n]["p50_ms"] and r["p50_ms"] > base[n]["p50_ms"] * (1 + max_regression)
+        ]
+        if worse:
+            console.print(f"[red]p50 regressed by more than {max_regression:.0%}: {', '.join(worse)}[/red]")
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,94 @@
+# app/context.py
+"""
+Keep the input sent to the Responses API within a token budget.
+
+Long sessions would otherwise resend every old turn — including every old
+function_call_output JSON blob — on every call. `fit_to_budget` trims in
+order of least value:
+
+  1. stale tool outputs (older turns) are replaced by a short stub
+  2. the oldest whole turns are dropped and replaced by one short note
+     listing what the user asked in them
+
+The most recent `keep_turns` turns are never touched. Token counts are a
+cheap estimate (~4 characters per token), not a tokenizer.
+"""
+import json
+from typing import Optional
+
+CHARS_PER_TOKEN = 4
+ITEM_OVERHEAD = 4  # role/type framing per item
+
+ELIDED_OUTPUT = json.dumps({"ok": True, "note": "older tool output elided to save context"})
+
+
+def estimate_tokens(item) -> int:
+    if isinstance(item, dict):
+        if isinstance(item.get("content"), str):
+            n = len(item["content"])
+        elif item.get("type") == "function_call_output":
+            n = len(str(item.get("output", "")))
+        else:
+            n = len(json.dumps(item, ensure_ascii=False))
+    else:
+        n = len(str(item))
+    return n // CHARS_PER_TOKEN + ITEM_OVERHEAD
+
+
+def _split_turns(items: list) -> list:
+    """Group items into turns, each starting at a user message."""
+    turns: list = []
+    for item in items:
+        if not turns or (isinstance(item, dict) and item.get("role") == "user"):
+            turns.append([])
+        turns[-1].append(item)
+    return turns
+
+
+def _summary_note(dropped: list) -> dict:
+    asks = []
+    for turn in dropped:
+        first = turn[0]
+        if isinstance(first, dict) and first.get("role") == "user":
+            text = " ".join(str(first.get("content", "")).split())
+            asks.append(text[:80] + ("…" if len(text) > 80 else ""))
+    lines = "; ".join(asks[-10:])
+    return {
+        "role": "developer",
+        "content": f"[{len(dropped)} earlier turn(s) trimmed to save context. The user had asked: {lines}]",
+    }
+
+
+def fit_to_budget(items: list, budget: Optional[int], keep_turns: int = 2) -> list:
+    """Return a copy of `items` whose estimated size fits `budget` tokens (None = no limit)."""
+    if not budget:
+        return list(items)
+    total = sum(estimate_tokens(it) for it in items)
+    if total <= budget:
+        return list(items)
+
+    turns = _split_turns(items)
+    keep = max(1, keep_turns)  # the current turn always goes out whole
+    old, recent = turns[:-keep], turns[-keep:]
+
+    # 1) Elide stale tool outputs, oldest first
+    slimmed = []
+    for turn in old:
+        new_turn = []
+        for it in turn:
+            if total > budget and isinstance(it, dict) and it.get("type") == "function_call_output":
+                stub = {**it, "output": ELIDED_OUTPUT}
+                total -= estimate_tokens(it) - estimate_tokens(stub)
+                it = stub
+            new_turn.append(it)
+        slimmed.append(new_turn)
+
+    # 2) Drop whole old turns, oldest first, leaving a one-line note in their place
+    dropped = []
+    while slimmed and total > budget:
+        turn = slimmed.pop(0)
+        dropped.append(turn)
+        total -= sum(estimate_tokens(it) for it in turn)
+
+    head = [_summary_note(dropped)] if dropped else []
+    return head + [it for turn in slimmed + recent for it in turn]
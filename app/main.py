@@ -1,9 +1,10 @@
+import logging
 import os
 import typer
-from typing import Optional
-from rich import print
-from dotenv import load_dotenv
-from .runner_responses import run_once as run_responses
+from typing import List, Optional
+
+# Heavy imports (openai, the runner, tools) are deferred into the command so
+# `--help` and argument errors return without loading them.
 
 app = typer.Typer(help="OpenAI function/tool-calling workshop (Responses API only)")
 
@@ -20,12 +21,66 @@ def run(
         "-f",
         help="Structured output format: 'currency' or 'time' (default: none).",
     ),
+    parallel: bool = typer.Option(
+        True, "--parallel/--sequential", help="Run the tool calls of a response concurrently."
+    ),
+    max_workers: int = typer.Option(8, help="Max tool calls executed at once in parallel mode."),
+    tool_timeout: float = typer.Option(15.0, help="Per-tool timeout in seconds (0 = none)."),
+    stream: bool = typer.Option(False, "--stream", help="Stream text as it arrives; start tools mid-stream."),
+    max_rounds: int = typer.Option(5, min=1, help="Max model calls per turn (model → tools → model ...)."),
+    context_budget: int = typer.Option(
+        16000, help="Approx. token budget for resent history (0 = no limit)."
+    ),
+    chain: bool = typer.Option(
+        False, "--chain", help="Link calls via previous_response_id and send only new items."
+    ),
+    tool_top_k: int = typer.Option(
+        0, help="Send only the k tools most relevant to the prompt (0 = all tools)."
+    ),
+    pin_tool: Optional[List[str]] = typer.Option(
+        None, "--pin-tool", help="Tool to always send when --tool-top-k is set (repeatable)."
+    ),
+    profile: bool = typer.Option(
+        False, "--profile", help="Print per-phase / per-tool timings and token usage after the run."
+    ),
+    profile_out: Optional[str] = typer.Option(
+        None, "--profile-out", help="Export profile spans: jsonl:PATH, otlp:PATH or otel."
+    ),
 ):
     """Run the workshop using the modern Responses API + tools."""
-    run_responses(prompt, model, session=session, structured=structured)
+    from .profiling import NULL_PROFILER, Profiler, get_exporter, print_summary
+    from .runner_responses import run_once as run_responses
+
+    exporter = get_exporter(profile_out)
+    profiler = Profiler() if (profile or exporter) else NULL_PROFILER
+    run_responses(
+        prompt,
+        model,
+        session=session,
+        structured=structured,
+        parallel=parallel,
+        max_workers=max_workers,
+        tool_timeout=tool_timeout,
+        stream=stream,
+        max_rounds=max_rounds,
+        context_budget=context_budget or None,
+        chain=chain,
+        tool_top_k=tool_top_k or None,
+        pin_tools=tuple(pin_tool or ()),
+        profiler=profiler,
+    )
+    if profile:
+        print_summary(profiler)
+    if exporter:
+        exporter.export(profiler)
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from rich import print
+
     load_dotenv()
-    if not os.getenv("OPENAI_API_KEY"):
+    # e.g. LOG_LEVEL=INFO shows which tools --tool-top-k pruned
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+    if not os.getenv("OPENAI_API_KEY") and os.getenv("RESPONSES_CACHE", "").lower() != "replay":
         print("[red]Missing OPENAI_API_KEY. Create a .env from .env.example[/red]")
     app()
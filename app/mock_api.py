@@ -0,0 +1,313 @@
+# app/mock_api.py
+"""
+Local stand-ins for the network services the workshop talks to, for offline
+runs and benchmarks (see app/bench.py).
+
+* `MockResponsesServer` speaks enough of `POST /v1/responses` for the runner
+  and the openai SDK: it answers from a script — per round, the
+  `function_call` items to emit, then a final text (or, when the request
+  carries a json_schema `text.format`, a JSON object matching the schema).
+  Streaming requests get the matching server-sent events; chained requests
+  (`previous_response_id`) continue the round count of the response they
+  follow.
+* `MockTimeServer` answers `GET /api/Time/current/zone` like timeapi.io.
+
+Both take a fixed `latency` (seconds) per request. Point the clients at them:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock
+    TIMEAPI_BASE_URL=http://127.0.0.1:8766 TIME_SOURCE=http
+
+    python -m app.mock_api --port 8765 --time-port 8766 --latency 0.2 --script script.json
+
+script.json: {"rounds": [[{"name": "get_time", "arguments": {"timezone": "Europe/Oslo"}}]],
+              "final_text": "It is noon in Oslo."}
+"""
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import typer
+
+from .context import estimate_tokens
+
+
+class MockScript:
+    """rounds[i] = function calls emitted in model round i+1; then `final_text`."""
+
+    def __init__(self, rounds: Optional[List[list]] = None, final_text: str = "This is a mock answer."):
+        self.rounds = [
+            [{"name": c["name"], "arguments": c.get("arguments", {})} if isinstance(c, dict)
+             else {"name": c[0], "arguments": c[1]} for c in rnd]
+            for rnd in (rounds or [])
+        ]
+        self.final_text = final_text
+
+    @classmethod
+    def from_file(cls, path: Path) -> "MockScript":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(data.get("rounds"), data.get("final_text", "This is a mock answer."))
+
+
+def _round_of(items: list) -> int:
+    """1-based model round: call_ids we issued after the last user message carry their round."""
+    last_user = max((i for i, it in enumerate(items) if isinstance(it, dict) and it.get("role") == "user"), default=-1)
+    done = 0
+    for it in items[last_user + 1:]:
+        if not isinstance(it, dict):
+            continue
+        cid = str(it.get("call_id") or "")
+        if it.get("type") == "function_call" and cid.startswith("call_r"):
+            done = max(done, int(cid[6:].split("_", 1)[0]))
+    return done + 1
+
+
+def _sample(schema: dict):
+    """Smallest value that validates against a (strict, simple) JSON schema."""
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {k: _sample(v) for k, v in (schema.get("properties") or {}).items()}
+    if kind == "array":
+        return []
+    return {"string": "mock", "number": 1.0, "integer": 1, "boolean": True}.get(kind)
+
+
+class _Server:
+    def __init__(self, handler, host: str = "127.0.0.1", port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "_Server":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoints
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+class _ResponsesHandler(_Handler):
+    def do_POST(self) -> None:
+        mock: MockResponsesServer = self.server.mock
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.rstrip("/").endswith("/responses"):
+            self._send_json(404, {"error": {"message": f"No route {self.path}", "type": "invalid_request_error"}})
+            return
+        req = json.loads(body or b"{}")
+        resp = mock.respond(req)
+        if not req.get("stream"):
+            time.sleep(mock.latency)
+            self._send_json(200, resp)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = list(mock.stream_events(resp))
+        for event in events:
+            time.sleep(mock.latency / len(events))
+            chunk = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class MockResponsesServer(_Server):
+    def __init__(self, script: Optional[MockScript] = None, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        super().__init__(_ResponsesHandler, host, port)
+        self.script = script or MockScript()
+        self.latency = latency
+        self.requests = 0
+        self._seen_prefixes: set = set()
+        self._rounds: dict = {}  # response id -> its round, for chained (previous_response_id) calls
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return self.url + "/v1"
+
+    def _usage(self, req: dict, output: list) -> dict:
+        prefix = estimate_tokens(json.dumps([req.get("tools"), req.get("text")]))
+        items = req.get("input")
+        n_in = prefix + sum(estimate_tokens(it) for it in (items if isinstance(items, list) else [items]))
+        n_out = sum(estimate_tokens(it) for it in output)
+        key = (req.get("prompt_cache_key"), json.dumps(req.get("tools"), sort_keys=True))
+        with self._lock:
+            self.requests += 1
+            cached = prefix if key in self._seen_prefixes else 0
+            self._seen_prefixes.add(key)
+        return {
+            "input_tokens": n_in,
+            "input_tokens_details": {"cached_tokens": cached},
+            "output_tokens": n_out,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": n_in + n_out,
+        }
+
+    def respond(self, req: dict) -> dict:
+        items = req.get("input")
+        items = items if isinstance(items, list) else [{"role": "user", "content": items}]
+        rnd = _round_of(items)
+        prev = req.get("previous_response_id")
+        if prev and not any(isinstance(it, dict) and it.get("role") == "user" for it in items):
+            # Chained follow-up: our function_call items stay server-side, so count from the previous response
+            with self._lock:
+                rnd = self._rounds.get(prev, 0) + 1
+        tools = {t.get("name") for t in req.get("tools") or []}
+        calls = self.script.rounds[rnd - 1] if rnd <= len(self.script.rounds) else []
+        calls = [c for c in calls if c["name"] in tools] if req.get("tool_choice") != "none" else []
+
+        if calls:
+            output = [{
+                "type": "function_call",
+                "id": f"fc_{uuid.uuid4().hex[:12]}",
+                "call_id": f"call_r{rnd}_{i}",
+                "name": c["name"],
+                "arguments": json.dumps(c["arguments"]),
+                "status": "completed",
+            } for i, c in enumerate(calls)]
+        else:
+            fmt = (req.get("text") or {}).get("format") or {}
+            text = json.dumps(_sample(fmt["schema"])) if fmt.get("type") == "json_schema" else self.script.final_text
+            output = [{
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex[:12]}",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }]
+        resp_id = f"resp_{uuid.uuid4().hex}"
+        with self._lock:
+            self._rounds[resp_id] = rnd
+        return {
+            "id": resp_id,
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": req.get("model", "mock"),
+            "output": output,
+            "parallel_tool_calls": req.get("parallel_tool_calls", True),
+            "tool_choice": req.get("tool_choice", "auto"),
+            "tools": req.get("tools") or [],
+            "text": req.get("text") or {"format": {"type": "text"}},
+            "usage": self._usage(req, output),
+        }
+
+    def stream_events(self, resp: dict):
+        seq = 0
+
+        def event(etype: str, **fields) -> dict:
+            nonlocal seq
+            seq += 1
+            return {"type": etype, "sequence_number": seq, **fields}
+
+        yield event("response.created", response={**resp, "status": "in_progress", "output": []})
+        for idx, item in enumerate(resp["output"]):
+            if item["type"] == "message":
+                text = item["content"][0]["text"]
+                for start in range(0, len(text), 16):
+                    yield event("response.output_text.delta", item_id=item["id"], output_index=idx,
+                                content_index=0, delta=text[start:start + 16], logprobs=[])
+            yield event("response.output_item.done", output_index=idx, item=item)
+        yield event("response.completed", response=resp)
+
+
+class _TimeHandler(_Handler):
+    def do_GET(self) -> None:
+        mock: MockTimeServer = self.server.mock
+        url = urlparse(self.path)
+        time.sleep(mock.latency)
+        if url.path != "/api/Time/current/zone":
+            self._send_json(404, {"error": f"No route {url.path}"})
+            return
+        tz = (parse_qs(url.query).get("timeZone") or [""])[0]
+        try:
+            now = datetime.now(ZoneInfo(tz))
+        except (ValueError, ZoneInfoNotFoundError):
+            self._send_json(400, {"error": f"Invalid timeZone '{tz}'"})
+            return
+        self._send_json(200, {
+            "year": now.year, "month": now.month, "day": now.day,
+            "hour": now.hour, "minute": now.minute, "seconds": now.second,
+            "milliSeconds": now.microsecond // 1000,
+            "dateTime": now.replace(tzinfo=None).isoformat(),
+            "date": now.strftime("%m/%d/%Y"), "time": now.strftime("%H:%M"),
+            "timeZone": tz, "dayOfWeek": now.strftime("%A"), "dstActive": bool(now.dst()),
+        })
+
+
+class MockTimeServer(_Server):
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        super().__init__(_TimeHandler, host, port)
+        self.latency = latency
+
+
+app = typer.Typer(help="Serve the mock Responses API (and a timeapi.io stub) locally.")
+
+
+@app.command()
+def main(
+    port: int = typer.Option(8765, help="Port for the mock Responses API."),
+    time_port: int = typer.Option(8766, help="Port for the timeapi.io stub (0 = don't start)."),
+    latency: float = typer.Option(0.0, help="Seconds added to every model response."),
+    tool_latency: float = typer.Option(0.0, help="Seconds added to every stub tool response."),
+    script: Optional[Path] = typer.Option(None, exists=True, dir_okay=False, help="JSON script of tool-call rounds."),
+):
+    """Serve until Ctrl+C."""
+    api = MockResponsesServer(MockScript.from_file(script) if script else None, latency, port=port).start()
+    print(f"Responses API: OPENAI_BASE_URL={api.base_url}")
+    servers = [api]
+    if time_port:
+        servers.append(MockTimeServer(tool_latency, port=time_port).start())
+        print(f"timeapi.io stub: TIMEAPI_BASE_URL={servers[-1].url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for s in servers:
+            s.stop()
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,312 @@
+# app/profiling.py
+"""
+Timing spans and token usage for one run.
+
+The runner opens a span around each phase (session I/O, tool selection,
+every model call) and around every tool dispatch, and reads `resp.usage`
+from each response. Nothing is recorded unless a `Profiler` is passed in:
+the default `NULL_PROFILER` hands out one shared no-op span, and tool
+calls skip the timing wrapper entirely.
+
+Output:
+  * `print_summary(profiler)` — a rich table (what `--profile` shows)
+  * exporters, picked by `get_exporter(spec)`:
+      jsonl:PATH   one JSON object per span, appended to PATH
+      otlp:PATH    OTLP/JSON (`resourceSpans`), loadable by OpenTelemetry tooling
+      otel         live spans through the opentelemetry API (optional dependency)
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+USAGE_FIELDS = ("input_tokens", "cached_tokens", "output_tokens", "reasoning_tokens", "total_tokens")
+
+
+class Span:
+    __slots__ = ("profiler", "name", "kind", "attrs", "span_id", "start_ns", "duration", "_t0")
+
+    def __init__(self, profiler: "Profiler", name: str, kind: str, attrs: dict):
+        self.profiler = profiler
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start_ns = 0
+        self.duration = 0.0
+
+    def __enter__(self) -> dict:
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter()
+        return self.attrs
+
+    def __exit__(self, etype, exc, tb) -> None:
+        self.duration = time.perf_counter() - self._t0
+        if etype is not None:
+            self.attrs["error"] = repr(exc)
+        self.profiler._add(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.profiler.trace_id,
+            "span_id": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+        }
+
+
+class _NullSpan:
+    def __enter__(self) -> dict:
+        return {}
+
+    def __exit__(self, etype, exc, tb) -> None:
+        return None
+
+
+class NullProfiler:
+    enabled = False
+
+    def __init__(self):
+        self._span = _NullSpan()
+
+    def span(self, name: str, kind: str = "phase", **attrs):
+        return self._span
+
+    def add_usage(self, attrs: dict, resp) -> None:
+        pass
+
+    def begin(self) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler:
+    """Collects spans for one run (thread-safe: tool spans close on worker threads)."""
+
+    enabled = True
+
+    def __init__(self, name: str = "run_once"):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.spans: list = []
+        self.usage = dict.fromkeys(USAGE_FIELDS, 0)
+        self.root: Optional[Span] = None
+        self._lock = threading.Lock()
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def span(self, name: str, kind: str = "phase", **attrs) -> Span:
+        return Span(self, name, kind, attrs)
+
+    def begin(self) -> None:
+        self.root = Span(self, self.name, "run", {})
+        self.root.__enter__()
+
+    def end(self) -> None:
+        if self.root is not None and not self.root.duration:
+            self.root.attrs.update(self.usage)
+            self.root.__exit__(None, None, None)
+
+    def add_usage(self, attrs: dict, resp) -> None:
+        """Copy `resp.usage` token counts into a span's attrs and the run totals."""
+        usage = getattr(resp, "usage", None)
+        if usage is None:
+            return
+        counts = {
+            "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+            "cached_tokens": getattr(getattr(usage, "input_tokens_details", None), "cached_tokens", 0) or 0,
+            "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+            "reasoning_tokens": getattr(getattr(usage, "output_tokens_details", None), "reasoning_tokens", 0) or 0,
+            "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+        }
+        attrs.update(counts)
+        with self._lock:
+            for k, v in counts.items():
+                self.usage[k] += v
+
+    def children(self) -> list:
+        """Finished spans except the root, in start order."""
+        return sorted((s for s in self.spans if s is not self.root), key=lambda s: s.start_ns)
+
+
+def _json_size(value) -> int:
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _tool_result(attrs: dict, result) -> None:
+    attrs["ok"] = not (isinstance(result, dict) and result.get("ok") is False)
+    if not attrs["ok"]:
+        attrs["error"] = result.get("error")
+    attrs["result_bytes"] = _json_size(result)
+
+
+def timed_tool(profiler, call, name: Optional[str], call_id: Optional[str], args: dict) -> dict:
+    """Run `call(name, args)` inside a tool span recording ok/error and payload sizes."""
+    with profiler.span(name or "?", kind="tool", call_id=call_id, args_bytes=_json_size(args)) as attrs:
+        result = call(name, args)
+        _tool_result(attrs, result)
+    return result
+
+
+async def atimed_tool(profiler, acall, name: Optional[str], call_id: Optional[str], args: dict) -> dict:
+    """Async counterpart of timed_tool for `await acall(name, args)`."""
+    with profiler.span(name or "?", kind="tool", call_id=call_id, args_bytes=_json_size(args)) as attrs:
+        result = await acall(name, args)
+        _tool_result(attrs, result)
+    return result
+
+
+# ---- output -------------------------------------------------------------------
+
+def print_summary(profiler: Profiler, console=None) -> None:
+    from rich.console import Console
+    from rich.table import Table
+
+    console = console or Console()
+    table = Table(title=f"Profile {profiler.trace_id[:8]}", show_lines=False)
+    table.add_column("kind", style="dim")
+    table.add_column("span")
+    table.add_column("ms", justify="right")
+    table.add_column("ok")
+    table.add_column("bytes in/out", justify="right")
+    table.add_column("tokens in/cached/out", justify="right")
+
+    for s in profiler.children():
+        a = s.attrs
+        ok = "" if "ok" not in a and "error" not in a else ("[green]✔[/green]" if a.get("ok", "error" not in a) else "[red]✘[/red]")
+        nbytes = f"{a['args_bytes']}/{a.get('result_bytes', 0)}" if "args_bytes" in a else ""
+        tokens = f"{a['input_tokens']}/{a['cached_tokens']}/{a['output_tokens']}" if "input_tokens" in a else ""
+        label = s.name + (f" [dim]{a['call_id']}[/dim]" if a.get("call_id") else "")
+        table.add_row(s.kind, label, f"{s.duration * 1000:.1f}", ok, nbytes, tokens)
+
+    u = profiler.usage
+    total = profiler.root.duration * 1000 if profiler.root else sum(s.duration for s in profiler.children()) * 1000
+    table.add_section()
+    table.add_row(
+        "run", "total", f"{total:.1f}", "", "",
+        f"{u['input_tokens']}/{u['cached_tokens']}/{u['output_tokens']}",
+    )
+    console.print(table)
+
+
+class JsonlExporter:
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def export(self, profiler: Profiler) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        spans = profiler.children() + ([profiler.root] if profiler.root else [])
+        lines = "".join(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" for s in spans)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+def _otlp_value(v) -> dict:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+class OtlpJsonExporter:
+    """Writes the run as one OTLP/JSON `ExportTraceServiceRequest` document per line."""
+
+    def __init__(self, path, service_name: str = "openai-tool-calling-workshop"):
+        self.path = Path(path)
+        self.service_name = service_name
+
+    def _span(self, profiler: Profiler, s: Span) -> dict:
+        out = {
+            "traceId": profiler.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.start_ns + int(s.duration * 1e9)),
+            "attributes": [{"key": "workshop.kind", "value": {"stringValue": s.kind}}]
+            + [{"key": k, "value": _otlp_value(v)} for k, v in s.attrs.items() if v is not None],
+            "status": {"code": 2 if "error" in s.attrs else 1},
+        }
+        if profiler.root is not None and s is not profiler.root:
+            out["parentSpanId"] = profiler.root.span_id
+        return out
+
+    def export(self, profiler: Profiler) -> None:
+        spans = profiler.children() + ([profiler.root] if profiler.root else [])
+        doc = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "app.profiling"}, "spans": [self._span(profiler, s) for s in spans]}],
+        }]}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(doc, ensure_ascii=False, default=str) + "\n")
+
+
+class OtelExporter:
+    """Replays the spans through the opentelemetry API (configure the SDK/exporter as usual)."""
+
+    def __init__(self):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise RuntimeError("The 'otel' exporter needs `pip install opentelemetry-sdk`") from e
+        self._trace = trace
+        self.tracer = trace.get_tracer("app.profiling")
+
+    def export(self, profiler: Profiler) -> None:
+        root = profiler.root
+        spans = profiler.children()
+        if root is None:
+            for s in spans:
+                self._emit(s, None)
+            return
+        parent = self.tracer.start_span(root.name, start_time=root.start_ns, attributes=self._attrs(root))
+        ctx = self._trace.set_span_in_context(parent)
+        for s in spans:
+            self._emit(s, ctx)
+        parent.end(end_time=root.start_ns + int(root.duration * 1e9))
+
+    def _attrs(self, s: Span) -> dict:
+        return {"workshop.kind": s.kind, **{k: v if isinstance(v, (bool, int, float, str)) else str(v)
+                                          for k, v in s.attrs.items() if v is not None}}
+
+    def _emit(self, s: Span, ctx) -> None:
+        span = self.tracer.start_span(s.name, context=ctx, start_time=s.start_ns, attributes=self._attrs(s))
+        if "error" in s.attrs:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(s.attrs["error"])))
+        span.end(end_time=s.start_ns + int(s.duration * 1e9))
+
+
+def get_exporter(spec: Optional[str]):
+    """`jsonl:PATH`, `otlp:PATH`, `otel`, or a bare `*.jsonl` path. None/'' → no exporter."""
+    if not spec:
+        return None
+    kind, _, target = spec.partition(":")
+    if kind == "otel" and not target:
+        return OtelExporter()
+    if kind == "jsonl" and target:
+        return JsonlExporter(target)
+    if kind == "otlp" and target:
+        return OtlpJsonExporter(target)
+    if not target and os.path.splitext(spec)[1] == ".jsonl":
+        return JsonlExporter(spec)
+    raise ValueError(f"Unknown profile exporter '{spec}' (use jsonl:PATH, otlp:PATH or otel)")
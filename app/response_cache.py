@@ -0,0 +1,228 @@
+# app/response_cache.py
+"""
+Record/replay cache for `client.responses.create`.
+
+Each request is fingerprinted from what determines the answer — model,
+canonicalized input, tool specs, text.format, tool_choice, parallel tool
+calls and previous_response_id — and the response is stored as JSON under
+RESPONSES_CACHE_DIR (default .cache/responses). Tool results in the input
+count by `call_id` only: the call's name and arguments are already in the
+fingerprint, and live results (get_time's clock) differ on every run.
+
+RESPONSES_CACHE=
+  passthrough  (default) always call the API
+  record       serve exact repeats from the store, call + store on a miss
+  replay       serve from the store only; a miss raises ReplayMiss, so tests
+               run offline and fail loudly when a request changes
+
+Eviction keeps at most RESPONSES_CACHE_MAX_ENTRIES files (oldest first) and
+drops entries older than RESPONSES_CACHE_MAX_AGE seconds, if set.
+Streaming calls are never cached (in replay mode they raise ReplayMiss).
+Replay needs no OPENAI_API_KEY: pass client_kwargs() when building the client.
+"""
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+FINGERPRINT_FIELDS = (
+    "model", "input", "tools", "text", "tool_choice", "parallel_tool_calls", "previous_response_id",
+)
+MODES = ("passthrough", "record", "replay")
+
+
+class ReplayMiss(LookupError):
+    """Replay mode found no stored response for a request."""
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _fingerprint_item(item):
+    if isinstance(item, dict) and item.get("type") == "function_call_output":
+        return {"type": "function_call_output", "call_id": item.get("call_id")}
+    return item
+
+
+def fingerprint(req: dict) -> str:
+    subset = {k: req.get(k) for k in FINGERPRINT_FIELDS}
+    if isinstance(subset["input"], list):
+        subset["input"] = [_fingerprint_item(it) for it in subset["input"]]
+    return hashlib.sha256(_canonical(subset).encode("utf-8")).hexdigest()
+
+
+def prefix_key(tools: list, text_arg: Optional[dict]) -> str:
+    """
+    Stable id for the tools/format prefix. Sent as prompt_cache_key so requests
+    sharing a prefix are routed to the same provider-side prompt cache.
+    """
+    return "wk-" + hashlib.sha256(_canonical([tools, text_arg]).encode("utf-8")).hexdigest()[:24]
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        mode: str = "passthrough",
+        cache_dir: Path = Path(".cache/responses"),
+        max_entries: int = 1000,
+        max_age: Optional[float] = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"RESPONSES_CACHE must be one of {MODES}, got '{mode}'")
+        self.mode = mode
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        max_age = os.getenv("RESPONSES_CACHE_MAX_AGE")
+        return cls(
+            mode=os.getenv("RESPONSES_CACHE", "passthrough").lower(),
+            cache_dir=Path(os.getenv("RESPONSES_CACHE_DIR", ".cache/responses")),
+            max_entries=int(os.getenv("RESPONSES_CACHE_MAX_ENTRIES", "1000")),
+            max_age=float(max_age) if max_age else None,
+        )
+
+    def _path(self, fp: str) -> Path:
+        return self.cache_dir / f"{fp}.json"
+
+    def get(self, fp: str) -> Optional[dict]:
+        p = self._path(fp)
+        try:
+            entry = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            entry = None
+        if entry is not None and self.max_age and time.time() - entry["stored_at"] > self.max_age:
+            p.unlink(missing_ok=True)
+            entry = None
+        with self._lock:
+            self.stats["hits" if entry else "misses"] += 1
+        return entry["response"] if entry else None
+
+    def put(self, fp: str, req: dict, response: dict) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        p = self._path(fp)
+        tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        entry = {
+            "stored_at": time.time(),
+            "request": {k: req.get(k) for k in FINGERPRINT_FIELDS},
+            "response": response,
+        }
+        tmp.write_text(json.dumps(entry, ensure_ascii=False, default=str), encoding="utf-8")
+        os.replace(tmp, p)
+        with self._lock:
+            self.stats["stores"] += 1
+            self._puts += 1
+            due = self._puts % 32 == 1
+        if due:
+            self.evict()
+
+    def evict(self) -> None:
+        files = []
+        for p in self.cache_dir.glob("*.json"):
+            try:
+                files.append((p.stat().st_mtime, p))
+            except OSError:
+                pass
+        files.sort()
+        now = time.time()
+        excess = len(files) - self.max_entries
+        for i, (mtime, p) in enumerate(files):
+            if i < excess or (self.max_age and now - mtime > self.max_age):
+                p.unlink(missing_ok=True)
+
+
+def _to_response(data: dict):
+    from openai.types.responses import Response
+    # Built the way the SDK builds API responses: no validation, so fields a
+    # newer SDK expects (but the recording lacks) don't break replay
+    return Response.construct(**data)
+
+
+class _CachingResponses:
+    def __init__(self, inner, cache: ResponseCache):
+        self._inner = inner
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def _bypass(self, req: dict) -> bool:
+        if req.get("stream") and self._cache.mode == "replay":
+            raise ReplayMiss("Streaming calls are not recorded; replay without --stream")
+        return bool(req.get("stream")) or self._cache.mode == "passthrough"
+
+    def create(self, **req):
+        if self._bypass(req):
+            return self._inner.create(**req)
+        fp = fingerprint(req)
+        hit = self._cache.get(fp)
+        if hit is not None:
+            return _to_response(hit)
+        if self._cache.mode == "replay":
+            raise ReplayMiss(f"No recorded response for request {fp[:12]} in {self._cache.cache_dir}")
+        resp = self._inner.create(**req)
+        self._cache.put(fp, req, resp.model_dump(mode="json"))
+        return resp
+
+
+class _AsyncCachingResponses(_CachingResponses):
+    async def create(self, **req):
+        if self._bypass(req):
+            return await self._inner.create(**req)
+        fp = fingerprint(req)
+        hit = self._cache.get(fp)
+        if hit is not None:
+            return _to_response(hit)
+        if self._cache.mode == "replay":
+            raise ReplayMiss(f"No recorded response for request {fp[:12]} in {self._cache.cache_dir}")
+        resp = await self._inner.create(**req)
+        self._cache.put(fp, req, resp.model_dump(mode="json"))
+        return resp
+
+
+class CachedClient:
+    """Proxy for an OpenAI/AsyncOpenAI client whose `.responses.create` goes through the cache."""
+
+    def __init__(self, client, cache: ResponseCache):
+        self._client = client
+        wrapper = _AsyncCachingResponses if inspect.iscoroutinefunction(client.responses.create) else _CachingResponses
+        self.responses = wrapper(client.responses, cache)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+_default_cache: Optional[ResponseCache] = None
+
+
+def default_cache() -> ResponseCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache.from_env()
+    return _default_cache
+
+
+def client_kwargs(cache: Optional[ResponseCache] = None) -> dict:
+    """Extra OpenAI()/AsyncOpenAI() arguments: replay never reaches the API, so it needs no real key."""
+    cache = cache or default_cache()
+    if cache.mode == "replay" and not os.getenv("OPENAI_API_KEY"):
+        return {"api_key": "replay-no-key"}
+    return {}
+
+
+def cached_client(client, cache: Optional[ResponseCache] = None):
+    """Wrap `client` unless the (env-configured) cache is in passthrough mode."""
+    cache = cache or default_cache()
+    if cache.mode == "passthrough" or isinstance(client, CachedClient):
+        return client
+    return CachedClient(client, cache)
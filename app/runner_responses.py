@@ -1,17 +1,27 @@
 # app/runner_responses.py
+import asyncio
+import inspect
 import json
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from pathlib import Path
 from typing import Optional
 
-from openai import OpenAI
+from openai import AsyncOpenAI, BadRequestError, NotFoundError, OpenAI
 from dotenv import load_dotenv
 from rich.console import Console
 
+from .context import fit_to_budget
+from .profiling import NULL_PROFILER, atimed_tool, timed_tool
+from .response_cache import cached_client, client_kwargs, prefix_key
+from .tool_select import select_tools
 from .tools import TOOL_SPECS_RESPONSES, FUNCTIONS
+from .tools.validation import check_text_format
 
 # Optional session persistence (if you created session_store.py)
 try:
-    from .session_store import load_session, save_session
+    from .session_store import append_session, load_session, load_session_meta, save_session_meta
     HAS_SESSIONS = True
 except Exception:
     HAS_SESSIONS = False
@@ -25,30 +35,337 @@ SCHEMA_MAP = {
     #"hello": SCHEMAS_DIR / "hello_answer.json",
 }
 
+def _read_formats() -> tuple:
+    """
+    Parse and check every app/schemas/*.json once, at import.
+    Returns ({path: format}, {path: problem}); problems are reported right away.
+    """
+    formats, errors = {}, {}
+    for p in sorted(set(SCHEMAS_DIR.glob("*.json")) | set(SCHEMA_MAP.values())):
+        try:
+            fmt = json.loads(p.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            continue  # reported when the format is requested
+        except Exception as e:
+            errors[p] = f"Failed to load schema {p}: {e!r}"
+            continue
+        problems = check_text_format(fmt)
+        if problems:
+            errors[p] = f"Invalid schema object in {p}: " + "; ".join(problems)
+        else:
+            formats[p] = fmt
+    for msg in errors.values():
+        console.print(msg, style="red", markup=False)
+    return formats, errors
+
+
+TEXT_FORMATS, _FORMAT_ERRORS = _read_formats()
+
+
 def _load_text_format(kind: Optional[str]) -> Optional[dict]:
     """
     kind: None | 'currency' | 'time'
     Returns a dict suitable for Responses 'text': {'format': <dict>}
+    (parsed and checked at import, see _read_formats)
     """
     if not kind:
         return None
     p = SCHEMA_MAP.get(kind.lower())
-    if not p or not p.exists():
+    if p in TEXT_FORMATS:
+        return TEXT_FORMATS[p]
+    if p in _FORMAT_ERRORS:
+        console.print(_FORMAT_ERRORS[p], style="red", markup=False)
+    else:
         console.print(f"[red]Structured format '{kind}' not found at {p}[/red]")
-        return None
+    return None
+
+
+class _InvalidArgs(dict):
+    """Empty kwargs standing in for `arguments` that didn't decode to a JSON object."""
+
+    def __init__(self, raw, error: str):
+        super().__init__()
+        self.raw = raw if isinstance(raw, str) else json.dumps(raw, ensure_ascii=False)
+        self.error = error
+
+
+def _parse_args(args_raw) -> dict:
+    """Decode the model's `arguments` (JSON string or dict) into kwargs."""
+    try:
+        args = json.loads(args_raw) if isinstance(args_raw, str) else (args_raw or {})
+    except ValueError as e:
+        return _InvalidArgs(args_raw, f"arguments: not valid JSON ({e})")
+    if not isinstance(args, dict):
+        return _InvalidArgs(args_raw, f"arguments: expected a JSON object (got {type(args).__name__})")
+    return args
+
+
+def _args_error(name: Optional[str], args: dict) -> Optional[dict]:
+    """The result to send back instead of calling the tool, if the call can't be made."""
+    if name not in FUNCTIONS:
+        return {"ok": False, "error": f"Unknown tool: {name}"}
+    if isinstance(args, _InvalidArgs):
+        return {"ok": False, "error": f"Invalid arguments for {name}", "errors": [args.error]}
+    return None
+
+
+def _call_tool(name: Optional[str], args: dict) -> dict:
+    error = _args_error(name, args)
+    if error:
+        return error
+    fn = FUNCTIONS[name]
     try:
-        fmt = json.loads(p.read_text(encoding="utf-8"))
+        if inspect.iscoroutinefunction(fn):
+            # Async-capable tools get their own loop inside the worker thread
+            return asyncio.run(fn(**args))
+        return fn(**args)
     except Exception as e:
-        console.print(f"[red]Failed to load schema {p}: {e!r}[/red]")
-        return None
+        return {"ok": False, "error": f"{e!r}"}
+
+
+class _ToolPool:
+    """
+    Runs each submitted call on its own daemon thread, at most `max_workers`
+    at a time (None = no limit). Unlike ThreadPoolExecutor workers, a hung
+    tool's thread doesn't keep the process alive at exit: once its timeout
+    has passed it is simply abandoned.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._slots = threading.BoundedSemaphore(max_workers) if max_workers else None
+        self._closed = False
+
+    def submit(self, fn, *args) -> Future:
+        fut = Future()
+
+        def run():
+            if self._slots:
+                self._slots.acquire()
+            try:
+                # Calls still waiting for a slot when the turn ends are dropped
+                if self._closed or not fut.set_running_or_notify_cancel():
+                    fut.cancel()
+                    return
+                try:
+                    fut.set_result(fn(*args))
+                except BaseException as e:
+                    fut.set_exception(e)
+            finally:
+                if self._slots:
+                    self._slots.release()
+
+        threading.Thread(target=run, name="tool-call", daemon=True).start()
+        return fut
+
+    def shutdown(self) -> None:
+        self._closed = True
+
+
+def _dispatch(profiler, pool: Optional[_ToolPool], name: Optional[str], call_id: Optional[str], args: dict):
+    """Run one tool call (on `pool` if given, returning the future), inside a tool span when profiling."""
+    if not profiler.enabled:
+        return pool.submit(_call_tool, name, args) if pool else _call_tool(name, args)
+    if pool:
+        return pool.submit(timed_tool, profiler, _call_tool, name, call_id, args)
+    return timed_tool(profiler, _call_tool, name, call_id, args)
+
+
+def _collect(pending: list, tool_timeout: Optional[float]) -> list:
+    """
+    pending: [(name, future, submitted_at), ...]. Waits for each future in
+    order, giving every tool `tool_timeout` seconds from its own submission.
+    """
+    results = []
+    for name, fut, submitted_at in pending:
+        remaining = max(0.0, submitted_at + tool_timeout - time.monotonic()) if tool_timeout else None
+        try:
+            results.append(fut.result(timeout=remaining))
+        except FutureTimeout:
+            results.append({"ok": False, "error": f"Tool '{name}' timed out after {tool_timeout}s"})
+    return results
+
+
+def _execute_tool_calls(
+    calls: list,
+    parallel: bool = True,
+    max_workers: int = 8,
+    tool_timeout: Optional[float] = 15.0,
+    profiler=NULL_PROFILER,
+) -> list:
+    """
+    calls: [(name, call_id, args), ...] in the order the model emitted them.
+    Returns the results in the same order. In parallel mode every call is
+    submitted to a bounded pool, so the tool phase takes as long as the
+    slowest call instead of the sum of all of them. Sequential mode runs them
+    one after another. Either way each call gets `tool_timeout` seconds.
+    """
+    if not tool_timeout and (not parallel or len(calls) < 2):
+        return [_dispatch(profiler, None, name, call_id, args) for name, call_id, args in calls]
+
+    pool = _ToolPool(max_workers if parallel else None)
+    try:
+        if not parallel:
+            return [
+                _collect([(name, _dispatch(profiler, pool, name, call_id, args), time.monotonic())], tool_timeout)[0]
+                for name, call_id, args in calls
+            ]
+        now = time.monotonic()
+        pending = [(name, _dispatch(profiler, pool, name, call_id, args), now) for name, call_id, args in calls]
+        return _collect(pending, tool_timeout)
+    finally:
+        # Don't block the turn on a hung tool; its thread finishes (or is dropped at exit) in the background
+        pool.shutdown()
+
+
+def _function_calls(resp) -> list:
+    """Collect [(name, call_id, args), ...] from a response, in output order."""
+    return [
+        (getattr(item, "name", None), getattr(item, "call_id", None),
+         _parse_args(getattr(item, "arguments", "{}")))
+        for item in (getattr(resp, "output", None) or [])
+        if getattr(item, "type", "") == "function_call"
+    ]
+
+
+def _append_tool_pairs(input_messages: list, calls: list, results: list) -> None:
+    # Pairs are appended in the model's original order, whatever finished first
+    for (name, call_id, args), result in zip(calls, results):
+        # Echo the function call back to the model
+        input_messages.append({
+            "type": "function_call",
+            "name": name,
+            "call_id": call_id,
+            # Malformed arguments go back as the model sent them
+            "arguments": args.raw if isinstance(args, _InvalidArgs) else json.dumps(args, ensure_ascii=False)
+        })
+        #console.print(f"[green]✔ Echoed function_call[/green] id={call_id}")
+
+        # Attach the tool result tied to the same call_id
+        input_messages.append({
+            "type": "function_call_output",
+            "call_id": call_id,
+            "output": json.dumps(result, ensure_ascii=False)
+        })
+        #console.print(f"[green]✔ Attached function_call_output[/green] id={call_id}")
+
+
+def _request_args(
+    model: str,
+    input_messages: list,
+    text_arg: Optional[dict],
+    parallel: bool,
+    tool_choice: str = "auto",
+    previous_response_id: Optional[str] = None,
+    tools: Optional[list] = None,
+) -> dict:
+    tools = TOOL_SPECS_RESPONSES if tools is None else tools
+    args = dict(
+        model=model,
+        tools=tools,
+        tool_choice=tool_choice,
+        parallel_tool_calls=parallel,
+        input=input_messages,
+        # Same tools + format → same key, so the provider can reuse the cached prefix
+        extra_body={"prompt_cache_key": prefix_key(tools, text_arg)},
+    )
+    if text_arg:
+        args["text"] = text_arg
+    if previous_response_id:
+        args["previous_response_id"] = previous_response_id
+    return args
+
+
+def _round_tools(round_no: int, first_tools: list, used: set, subset: bool) -> list:
+    """
+    Tools offered this round. The first call gets the prompt-relevant subset;
+    with subsetting on, follow-up calls only get tools already used this turn.
+    """
+    if round_no == 1 or not subset:
+        return first_tools
+    return [s for s in TOOL_SPECS_RESPONSES if s["name"] in used]
+
+
+def _round_input(input_messages: list, since: int, prev_id: Optional[str], budget: Optional[int]) -> list:
+    """
+    What to send this round. Chained to `prev_id`, the server already holds
+    everything up to the model's last output, so only items added since then
+    go out (minus our function_call echoes, which are the model's own output).
+    Otherwise the whole history goes out, trimmed to the token budget.
+    """
+    if prev_id:
+        return [it for it in input_messages[since:]
+                if not (isinstance(it, dict) and it.get("type") == "function_call")]
+    return fit_to_budget(input_messages, budget)
+
+
+def _load_history(session: str, store) -> list:
+    return store.load(session) if store is not None else load_session(session)
 
-    # Expect the direct 'text.format' object shape:
-    # { "type": "json_schema", "name": "...", "schema": {...}, "strict": true }
-    if fmt.get("type") != "json_schema" or "schema" not in fmt:
-        console.print(f"[red]Invalid schema object in {p} "
-                      f"(expected keys: type='json_schema' and 'schema').[/red]")
+
+def _save_history(session: str, items: list, store) -> None:
+    if store is not None:
+        store.append(session, items)
+    else:
+        append_session(session, items)
+
+
+def _chain_start(session: Optional[str], chain: bool, n_stored: int, store=None) -> Optional[str]:
+    """Last response id of the session, if the server-side state is still in sync with the store."""
+    if not (chain and session and HAS_SESSIONS):
         return None
-    return fmt
+    meta = store.load_meta(session) if store is not None else load_session_meta(session)
+    # Someone else appended turns since our last response → resend history instead
+    if meta.get("n_items") != n_stored:
+        return None
+    return meta.get("last_response_id")
+
+
+def _save_chain(session: Optional[str], chain: bool, prev_id: Optional[str], n_items: int, store=None) -> None:
+    if chain and session and HAS_SESSIONS and prev_id:
+        meta = {"last_response_id": prev_id, "n_items": n_items}
+        if store is not None:
+            store.save_meta(session, meta)
+        else:
+            save_session_meta(session, meta)
+
+
+def _stream_round(client, req: dict, pool: Optional[_ToolPool], tool_timeout: Optional[float], profiler=NULL_PROFILER):
+    """
+    One streamed model call. Text deltas are printed as they arrive and each
+    function_call is handed to `pool` the moment its arguments are complete,
+    so tools overlap with the rest of the stream. With no pool (sequential
+    mode) the calls run one by one after the stream ends.
+    Returns (response, calls, results).
+    """
+    resp = None
+    started_text = False
+    calls, pending = [], []
+    for event in client.responses.create(**req, stream=True):
+        etype = getattr(event, "type", "")
+        if etype == "response.output_text.delta":
+            if not started_text:
+                console.print("[bold cyan]Assistant:[/bold cyan] ", end="")
+                started_text = True
+            console.print(event.delta, end="", markup=False, highlight=False, soft_wrap=True)
+        elif etype == "response.output_item.done" and getattr(event.item, "type", "") == "function_call":
+            name = getattr(event.item, "name", None)
+            args = _parse_args(getattr(event.item, "arguments", "{}"))
+            call_id = getattr(event.item, "call_id", None)
+            calls.append((name, call_id, args))
+            if pool is not None:
+                pending.append((name, _dispatch(profiler, pool, name, call_id, args), time.monotonic()))
+        elif etype in ("response.completed", "response.incomplete", "response.failed"):
+            resp = event.response
+        elif etype == "error":
+            raise RuntimeError(f"Responses stream error: {getattr(event, 'message', event)}")
+    if started_text:
+        console.print()
+
+    if pool is not None:
+        results = _collect(pending, tool_timeout)
+    else:
+        results = _execute_tool_calls(calls, parallel=False, tool_timeout=tool_timeout, profiler=profiler)
+    return resp, calls, results
 
 
 def run_once(
@@ -56,15 +373,47 @@ def run_once(
     model: str = "gpt-4o-mini",
     session: Optional[str] = None,
     structured: Optional[str] = None,  # 'currency' | 'time' | None
-) -> None:
-    load_dotenv()
-    client = OpenAI()
+    parallel: bool = True,
+    max_workers: int = 8,
+    tool_timeout: Optional[float] = 15.0,
+    stream: bool = False,
+    max_rounds: int = 5,
+    context_budget: Optional[int] = 16000,
+    chain: bool = False,
+    tool_top_k: Optional[int] = None,
+    pin_tools: tuple = (),
+    profiler=NULL_PROFILER,
+    client: Optional[OpenAI] = None,
+    store=None,
+) -> Optional[str]:
+    """
+    Loop model → tools → model until the model stops asking for tools.
+    `max_rounds` caps the number of model calls; the last allowed call runs
+    with tool_choice='none' so the turn always ends with an answer.
+    History is trimmed to `context_budget` tokens; with `chain=True` calls
+    are linked via previous_response_id and only the new items are sent.
+    With `tool_top_k`, only the k tools most relevant to the prompt (plus
+    `pin_tools`) are sent. Pass an app.profiling.Profiler to record per-phase
+    and per-tool timings and token usage. A long-running caller (app.server)
+    passes its shared `client` and session `store` (e.g. WriteBehindSessions).
+    Returns the final assistant text.
+    """
+    if client is None:
+        load_dotenv()
+        client = OpenAI(**client_kwargs())
+    client = cached_client(client)
+    profiler.begin()
 
     # Load prior conversation if sessions are enabled
     if session and HAS_SESSIONS:
-        input_messages = load_session(session)
+        with profiler.span("session.load", session=session) as attrs:
+            input_messages = _load_history(session, store)
+            attrs["items"] = len(input_messages)
     else:
         input_messages = []
+    n_stored = len(input_messages)  # everything after this is new in this turn
+    prev_id = _chain_start(session, chain, n_stored, store)
+    since = n_stored  # first item the server hasn't seen yet (when chaining)
 
     # 1) Start with user message
     input_messages.append({"role": "user", "content": prompt})
@@ -73,88 +422,219 @@ def run_once(
     text_format_obj = _load_text_format(structured)
     text_arg = {"format": text_format_obj} if text_format_obj else None
 
-    # First pass: let the model decide whether to call tools
-    first_args = dict(
-        model=model,
-        input=input_messages,
-        tools=TOOL_SPECS_RESPONSES,
-        tool_choice="auto",
-        parallel_tool_calls=False,  # linear for the workshop
-    )
-    if text_arg:
-        first_args["text"] = text_arg
-
-    resp = client.responses.create(**first_args)
-
-    # If the model already answered, print it and persist (if sessions)
-    if getattr(resp, "output_text", None):
-        console.print(f"[bold cyan]Assistant:[/bold cyan] {resp.output_text}")
-        if session and HAS_SESSIONS:
-            input_messages.append({"role": "assistant", "content": resp.output_text})
-
-    # 2) Execute any tool calls and append BOTH the call and its output
-    had_tools = False
-    for item in (resp.output or []):
-        if getattr(item, "type", "") == "function_call":
-            had_tools = True
-            name = getattr(item, "name", None)
-            call_id = getattr(item, "call_id", None)
-            args_raw = getattr(item, "arguments", "{}")
-            try:
-                args = json.loads(args_raw) if isinstance(args_raw, str) else (args_raw or {})
-            except Exception:
-                args = {}
+    # Only send tool schemas relevant to the prompt (all of them if tool_top_k is unset)
+    with profiler.span("select_tools") as attrs:
+        first_tools, _ = select_tools(prompt, TOOL_SPECS_RESPONSES, tool_top_k or 0, pin_tools)
+        attrs["tools"] = len(first_tools)
+    used: set = set()
 
-            """console.print(
+    # A streamed turn keeps one pool across rounds so tools can start mid-stream
+    pool = _ToolPool(max_workers) if stream and parallel else None
+
+    def model_round(req: dict):
+        with profiler.span(
+            "model.call", kind="model", stream=stream, tool_choice=req["tool_choice"],
+            tools=len(req["tools"]), input_items=len(req["input"]),
+        ) as attrs:
+            if stream:
+                resp, calls, results = _stream_round(client, req, pool, tool_timeout, profiler)
+            else:
+                resp = client.responses.create(**req)
+            profiler.add_usage(attrs, resp)
+        if stream:
+            return resp, calls, results
+        if getattr(resp, "output_text", None):
+            console.print(f"[bold cyan]Assistant:[/bold cyan] {resp.output_text}")
+        calls = _function_calls(resp)
+
+        """for name, call_id, args in calls:
+            console.print(
                 f"[yellow]→ Tool call[/yellow] [bold]{name}[/bold] "
                 f"[dim]id={call_id}[/dim] args={args}"
             )"""
 
-            fn = FUNCTIONS.get(name)
-            if not fn:
-                result = {"ok": False, "error": f"Unknown tool: {name}"}
-            else:
-                try:
-                    result = fn(**args)
-                except Exception as e:
-                    result = {"ok": False, "error": f"{e!r}"}
-
-            # Echo the function call back to the model
-            input_messages.append({
-                "type": "function_call",
-                "name": name,
-                "call_id": call_id,
-                "arguments": json.dumps(args, ensure_ascii=False)
-            })
-            #console.print(f"[green]✔ Echoed function_call[/green] id={call_id}")
-
-            # Attach the tool result tied to the same call_id
-            input_messages.append({
-                "type": "function_call_output",
-                "call_id": call_id,
-                "output": json.dumps(result, ensure_ascii=False)
-            })
-            #console.print(f"[green]✔ Attached function_call_output[/green] id={call_id}")
-
-    # 3) Ask the model to produce the final answer with the tool outputs in context
-    if had_tools:
-        second_args = dict(
-            model=model,
-            input=input_messages,
-            tools=TOOL_SPECS_RESPONSES,
-            tool_choice="auto",
-            parallel_tool_calls=False,
-        )
-        if text_arg:
-            second_args["text"] = text_arg
+        if not calls:
+            return resp, calls, []
+        with profiler.span("tools", calls=len(calls)):
+            results = _execute_tool_calls(calls, parallel, max_workers, tool_timeout, profiler)
+        return resp, calls, results
+
+    output_text = None
+    try:
+        max_rounds = max(1, max_rounds)  # 0 or less would end the turn without an answer
+        for round_no in range(1, max_rounds + 1):
+            tool_choice = "none" if round_no == max_rounds else "auto"
+            tools = _round_tools(round_no, first_tools, used, bool(tool_top_k))
+            req = _request_args(
+                model, _round_input(input_messages, since, prev_id, context_budget),
+                text_arg, parallel, tool_choice, prev_id, tools,
+            )
+
+            # 2) Let the model answer or ask for tools
+            try:
+                resp, calls, results = model_round(req)
+            except (BadRequestError, NotFoundError):
+                if round_no > 1 or not prev_id:
+                    raise
+                # Stored response expired/deleted server-side: fall back to sending history
+                prev_id = None
+                req = _request_args(
+                    model, _round_input(input_messages, since, None, context_budget),
+                    text_arg, parallel, tool_choice, None, tools,
+                )
+                resp, calls, results = model_round(req)
+
+            # Persist any text the model produced this round (if sessions)
+            if getattr(resp, "output_text", None):
+                output_text = resp.output_text
+                if session and HAS_SESSIONS:
+                    input_messages.append({"role": "assistant", "content": resp.output_text})
+            if chain:
+                prev_id = getattr(resp, "id", None)
+                since = len(input_messages)
 
-        resp2 = client.responses.create(**second_args)
+            # 3) No tool calls → the model is done; else feed the outputs back and go again
+            if not calls:
+                break
+            used.update(name for name, _, _ in calls)
+            _append_tool_pairs(input_messages, calls, results)
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
-        if getattr(resp2, "output_text", None):
-            console.print(f"[bold cyan]Assistant:[/bold cyan] {resp2.output_text}")
+    # Save session (if enabled): append only this turn's items
+    if session and HAS_SESSIONS:
+        with profiler.span("session.save", session=session, items=len(input_messages) - n_stored):
+            _save_history(session, input_messages[n_stored:], store)
+            _save_chain(session, chain, prev_id, len(input_messages), store)
+    profiler.end()
+    return output_text
+
+
+# ---------------------------------------------------------------------------
+# Async variant (used by app.batch): same handshake, no printing, returns text
+# ---------------------------------------------------------------------------
+
+async def _acall_tool(
+    name: Optional[str],
+    args: dict,
+    tool_timeout: Optional[float],
+    profiler=NULL_PROFILER,
+    call_id: Optional[str] = None,
+) -> dict:
+    if profiler.enabled:
+        return await atimed_tool(profiler, lambda n, a: _acall_tool(n, a, tool_timeout), name, call_id, args)
+    fn = FUNCTIONS.get(name)
+    if fn and not inspect.iscoroutinefunction(fn):
+        # Sync tools (blocking requests.get, ...) run on the default thread pool
+        coro = asyncio.to_thread(_call_tool, name, args)
+    else:
+        coro = _acall_async_tool(name, args)
+    try:
+        return await asyncio.wait_for(coro, tool_timeout)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"Tool '{name}' timed out after {tool_timeout}s"}
+
+
+async def _acall_async_tool(name: Optional[str], args: dict) -> dict:
+    error = _args_error(name, args)
+    if error:
+        return error
+    try:
+        return await FUNCTIONS[name](**args)
+    except Exception as e:
+        return {"ok": False, "error": f"{e!r}"}
+
+
+async def run_once_async(
+    prompt: str,
+    model: str = "gpt-4o-mini",
+    session: Optional[str] = None,
+    structured: Optional[str] = None,
+    client: Optional[AsyncOpenAI] = None,
+    parallel: bool = True,
+    tool_timeout: Optional[float] = 15.0,
+    max_rounds: int = 5,
+    context_budget: Optional[int] = 16000,
+    chain: bool = False,
+    tool_top_k: Optional[int] = None,
+    pin_tools: tuple = (),
+    profiler=NULL_PROFILER,
+    store=None,
+) -> Optional[str]:
+    """
+    Async counterpart of run_once for bulk use: pass a shared AsyncOpenAI
+    client so many prompts reuse one connection pool. Returns the final
+    assistant text (or None) instead of printing it. API errors propagate
+    so the caller can apply its own retry/backoff policy.
+    """
+    profiler.begin()
+    client = cached_client(client or AsyncOpenAI(**client_kwargs()))
+
+    if session and HAS_SESSIONS:
+        with profiler.span("session.load", session=session):
+            input_messages = _load_history(session, store)
+    else:
+        input_messages = []
+    n_stored = len(input_messages)
+    prev_id = _chain_start(session, chain, n_stored, store)
+    since = n_stored
+    input_messages.append({"role": "user", "content": prompt})
+
+    text_format_obj = _load_text_format(structured)
+    text_arg = {"format": text_format_obj} if text_format_obj else None
+
+    # Only send tool schemas relevant to the prompt (all of them if tool_top_k is unset)
+    first_tools, _ = select_tools(prompt, TOOL_SPECS_RESPONSES, tool_top_k or 0, pin_tools)
+    used: set = set()
+
+    output_text = None
+    max_rounds = max(1, max_rounds)  # 0 or less would end the turn without an answer
+    for round_no in range(1, max_rounds + 1):
+        tool_choice = "none" if round_no == max_rounds else "auto"
+        tools = _round_tools(round_no, first_tools, used, bool(tool_top_k))
+        req = _request_args(
+            model, _round_input(input_messages, since, prev_id, context_budget),
+            text_arg, parallel, tool_choice, prev_id, tools,
+        )
+        with profiler.span(
+            "model.call", kind="model", tool_choice=tool_choice, tools=len(tools), input_items=len(req["input"]),
+        ) as attrs:
+            try:
+                resp = await client.responses.create(**req)
+            except (BadRequestError, NotFoundError):
+                if round_no > 1 or not prev_id:
+                    raise
+                prev_id = None
+                resp = await client.responses.create(**_request_args(
+                    model, _round_input(input_messages, since, None, context_budget),
+                    text_arg, parallel, tool_choice, None, tools,
+                ))
+            profiler.add_usage(attrs, resp)
+        if getattr(resp, "output_text", None):
+            output_text = resp.output_text
             if session and HAS_SESSIONS:
-                input_messages.append({"role": "assistant", "content": resp2.output_text})
+                input_messages.append({"role": "assistant", "content": output_text})
+        if chain:
+            prev_id = getattr(resp, "id", None)
+            since = len(input_messages)
+
+        calls = _function_calls(resp)
+        if not calls:
+            break
+        used.update(name for name, _, _ in calls)
+        with profiler.span("tools", calls=len(calls)):
+            if parallel:
+                results = await asyncio.gather(*(
+                    _acall_tool(name, args, tool_timeout, profiler, call_id) for name, call_id, args in calls
+                ))
+            else:
+                results = [await _acall_tool(name, args, tool_timeout, profiler, call_id) for name, call_id, args in calls]
+        _append_tool_pairs(input_messages, calls, list(results))
 
-    # Save session (if enabled)
     if session and HAS_SESSIONS:
-        save_session(session, input_messages)
+        with profiler.span("session.save", session=session):
+            _save_history(session, input_messages[n_stored:], store)
+            _save_chain(session, chain, prev_id, len(input_messages), store)
+    profiler.end()
+    return output_text
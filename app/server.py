@@ -0,0 +1,268 @@
+# app/server.py
+"""
+Long-running HTTP service around the Responses runner, for chat frontends.
+
+A CLI run pays for its setup on every turn: a new OpenAI client and
+connection pool, reading .env, parsing the structured-output schemas and
+loading the session from disk. The server does all of that once:
+
+  * one shared OpenAI client (keep-alive connection pool) for every request
+  * structured formats parsed and checked once, at import
+  * hot sessions in memory (WriteBehindSessions); new turns are written to
+    the session store in the background
+  * many conversations at once (one thread per request, bounded by
+    --max-concurrent); turns of the SAME session run one at a time
+
+    python -m app.server --port 8000
+
+    POST /v1/run   {"prompt": "...", "session": "alice", "structured": "currency",
+                    "model": "gpt-4o-mini", "chain": false, "tool_top_k": 3,
+                    "pin_tools": [], "max_rounds": 5, "context_budget": 16000}
+               →   {"ok": true, "output_text": "...", "session": "alice", "elapsed": 0.84}
+    GET  /healthz  → {"ok": true, "in_flight": 2, "hot_sessions": 17}
+"""
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+
+import typer
+from dotenv import load_dotenv
+
+MAX_BODY_BYTES = 1 << 20
+
+# Session names become file names in the session store
+SESSION_NAME = re.compile(r"[A-Za-z0-9_.-]{1,128}")
+
+# Request fields passed through to run_once, with their types
+RUN_FIELDS = {
+    "model": str,
+    "session": str,
+    "structured": str,
+    "parallel": bool,
+    "max_rounds": int,
+    "context_budget": int,
+    "chain": bool,
+    "tool_top_k": int,
+    "pin_tools": list,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: Optional[dict] = None) -> None:
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self) -> None:
+        if self.path != "/healthz":
+            self._send_json(404, {"ok": False, "error": f"No route {self.path}"})
+            return
+        self._send_json(200, self.server.app.health())
+
+    def do_POST(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"ok": False, "error": "Invalid Content-Length"})
+            self.close_connection = True
+            return
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"ok": False, "error": "Request body too large"})
+            self.close_connection = True
+            return
+        body = self.rfile.read(length)
+        if self.path != "/v1/run":
+            self._send_json(404, {"ok": False, "error": f"No route {self.path}"})
+            return
+        try:
+            req = json.loads(body or b"{}")
+        except ValueError as e:
+            self._send_json(400, {"ok": False, "error": f"Invalid JSON: {e}"})
+            return
+        status, result = self.server.app.run(req)
+        headers = {"Retry-After": "1"} if status == 503 else None
+        self._send_json(status, result, headers)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog; the default (5) resets bursts of new connections
+
+
+class WorkshopServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        max_concurrent: int = 32,
+        queue_timeout: float = 30.0,
+        flush_interval: float = 1.0,
+        max_sessions: int = 1000,
+    ):
+        load_dotenv()
+        from openai import OpenAI
+
+        from . import runner_responses
+        from .response_cache import client_kwargs
+        from .session_store import WriteBehindSessions
+
+        self.runner = runner_responses
+        self.client = OpenAI(**client_kwargs())
+        self.store = WriteBehindSessions(flush_interval=flush_interval, max_sessions=max_sessions)
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._in_flight = 0
+        self._session_locks: dict = {}  # session -> [lock, turns holding or waiting for it]
+        self._lock = threading.Lock()
+        self.httpd = _HTTPServer((host, port), _Handler)
+        self.httpd.app = self
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def health(self) -> dict:
+        with self._lock:
+            return {"ok": True, "in_flight": self._in_flight, "hot_sessions": self.store.hot_sessions}
+
+    @contextmanager
+    def _session_turn(self, session: Optional[str]) -> Iterator[None]:
+        """Run turns of one session one at a time; the lock is dropped once no turn needs it."""
+        if not session:
+            yield
+            return
+        with self._lock:
+            entry = self._session_locks.setdefault(session, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._session_locks[session]
+
+    def _parse(self, req: dict) -> tuple:
+        """(prompt, run_once kwargs), or raises ValueError with a message for the client."""
+        if not isinstance(req, dict):
+            raise ValueError("Body must be a JSON object")
+        prompt = req.get("prompt")
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise ValueError("'prompt' must be a non-empty string")
+        kwargs = {}
+        for field, kind in RUN_FIELDS.items():
+            value = req.get(field)
+            if value is None:
+                continue
+            if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+                raise ValueError(f"'{field}' must be of type {kind.__name__}")
+            kwargs[field] = value
+        if "session" in kwargs and (not SESSION_NAME.fullmatch(kwargs["session"]) or ".." in kwargs["session"]):
+            raise ValueError("'session' must be 1-128 letters, digits, '_', '-' or '.' (no '..')")
+        if "structured" in kwargs and kwargs["structured"].lower() not in self.runner.SCHEMA_MAP:
+            raise ValueError(f"Unknown structured format '{kwargs['structured']}'")
+        if kwargs.get("max_rounds", 1) < 1:
+            raise ValueError("'max_rounds' must be at least 1")
+        if "pin_tools" in kwargs:
+            kwargs["pin_tools"] = tuple(kwargs["pin_tools"])
+        if kwargs.get("context_budget") == 0:
+            kwargs["context_budget"] = None
+        return prompt, kwargs
+
+    def run(self, req: dict) -> tuple:
+        """Handle one POST /v1/run body; returns (HTTP status, JSON body)."""
+        import openai
+
+        try:
+            prompt, kwargs = self._parse(req)
+        except ValueError as e:
+            return 400, {"ok": False, "error": str(e)}
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            return 503, {"ok": False, "error": "Server busy, retry later"}
+        with self._lock:
+            self._in_flight += 1
+        started = time.perf_counter()
+        session = kwargs.get("session")
+        try:
+            with self._session_turn(session):
+                text = self.runner.run_once(prompt, client=self.client, store=self.store, **kwargs)
+        except openai.APIStatusError as e:
+            return 502, {"ok": False, "error": f"{e!r}", "upstream_status": e.status_code}
+        except openai.APIError as e:
+            return 502, {"ok": False, "error": f"{e!r}"}
+        except Exception as e:
+            return 500, {"ok": False, "error": f"{e!r}"}
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+        return 200, {
+            "ok": True,
+            "output_text": text,
+            "session": session,
+            "elapsed": round(time.perf_counter() - started, 3),
+        }
+
+    def serve_forever(self) -> None:
+        self.httpd.serve_forever()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.store.close()  # flush queued session writes
+        self.client.close()
+
+
+app = typer.Typer(help="Serve the Responses runner over HTTP (one shared client, hot sessions).")
+
+
+@app.command()
+def main(
+    host: str = typer.Option("127.0.0.1", help="Interface to bind."),
+    port: int = typer.Option(8000, help="Port to listen on."),
+    max_concurrent: int = typer.Option(32, help="Turns processed at once; more wait up to --queue-timeout."),
+    queue_timeout: float = typer.Option(30.0, help="Seconds a request may wait for a slot before a 503."),
+    flush_interval: float = typer.Option(1.0, help="Seconds between background session writes."),
+    max_sessions: int = typer.Option(1000, help="Sessions kept in memory (least recently used evicted)."),
+    verbose: bool = typer.Option(False, "--verbose", help="Also print assistant text to the console."),
+):
+    """Serve POST /v1/run until Ctrl+C."""
+    import logging
+    import os
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+    server = WorkshopServer(host, port, max_concurrent, queue_timeout, flush_interval, max_sessions)
+    server.runner.console.quiet = not verbose
+    print(f"Listening on {server.url} (POST /v1/run, GET /healthz)")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    app()
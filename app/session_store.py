@@ -1,21 +1,482 @@
 # app/session_store.py
-import json, os
+"""
+Session persistence for multi-turn conversations across CLI runs.
+
+Each turn only APPENDS its new items, so the cost per turn is O(new items)
+instead of rewriting the whole history. Two backends:
+
+  * "jsonl"  (default) — .sessions/<name>.jsonl, one item per line, appended
+                         under an exclusive file lock in a single write
+  * "sqlite"           — .sessions/sessions.db, one row per item
+
+Pick one with SESSION_BACKEND=jsonl|sqlite (SESSION_DIR moves the folder).
+Set SESSION_MAX_ITEMS to cap stored history: once a session grows 25% past
+the cap it is compacted to the most recent whole turns.
+Old whole-file .sessions/<name>.json sessions are still read and migrated
+to the active backend the first time they are loaded.
+"""
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, Optional
 
-SESS_DIR = Path(".sessions")
-SESS_DIR.mkdir(exist_ok=True)
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
-def _path(name: str) -> Path:
-    return SESS_DIR / f"{name}.json"
 
-def load_session(name: str) -> list:
-    p = _path(name)
+def _sess_dir() -> Path:
+    # Resolved per call (not at import) so .env / tests can redirect it
+    return Path(os.getenv("SESSION_DIR", ".sessions"))
+
+
+def _session_file(name: str, suffix: str) -> Path:
+    """SESSION_DIR/<name><suffix>, refusing names that resolve outside SESSION_DIR ('../x', '/tmp/x')."""
+    root = _sess_dir().resolve()
+    p = (root / f"{name}{suffix}").resolve()
+    if p == root or not p.is_relative_to(root):
+        raise ValueError(f"Invalid session name {name!r}")
+    return p
+
+
+@contextmanager
+def _locked(lock_path: Path, exclusive: bool = True) -> Iterator[None]:
+    """
+    Cross-process lock on a sidecar file. The data file itself can't carry
+    the lock because compaction replaces it (new inode).
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _load_legacy(name: str) -> Optional[list]:
+    p = _session_file(name, ".json")
     if not p.exists():
-        return []
+        return None
     try:
-        return json.loads(p.read_text(encoding="utf-8"))
+        data = json.loads(p.read_text(encoding="utf-8"))
+        return data if isinstance(data, list) else None
     except Exception:
-        return []
+        return None
+
+
+def _trim_to_turn(items: list, keep_last: Optional[int]) -> list:
+    """Keep at most `keep_last` items, starting on a user message so tool pairs stay whole."""
+    if not keep_last or len(items) <= keep_last:
+        return items
+    tail = items[-keep_last:]
+    for i, item in enumerate(tail):
+        if isinstance(item, dict) and item.get("role") == "user":
+            return tail[i:]
+    return []
+
+
+class SessionStore(ABC):
+    """Backend interface: load a history, append a turn's items, compact."""
+
+    @abstractmethod
+    def load(self, name: str) -> list:
+        ...
+
+    @abstractmethod
+    def append(self, name: str, items: list) -> None:
+        ...
+
+    @abstractmethod
+    def replace(self, name: str, items: list) -> None:
+        """Overwrite the whole history (migration / compaction)."""
+
+    def compact(self, name: str, keep_last: Optional[int] = None) -> None:
+        # Not atomic: backends that can be shared between processes override this
+        self.replace(name, _trim_to_turn(self.load(name), keep_last))
+
+    @abstractmethod
+    def load_meta(self, name: str) -> dict:
+        """Small per-session key/value data (e.g. the last response id)."""
+
+    @abstractmethod
+    def save_meta(self, name: str, meta: dict) -> None:
+        ...
+
+
+class JsonlSessionStore(SessionStore):
+    def _path(self, name: str) -> Path:
+        return _session_file(name, ".jsonl")
+
+    def _lock(self, name: str) -> Path:
+        return _session_file(name, ".lock")
+
+    @staticmethod
+    def _read(p: Path):
+        items, torn = [], False
+        with p.open(encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    torn = True  # partial line from a crashed writer
+        return items, torn
+
+    @staticmethod
+    def _write_all(p: Path, items: list) -> None:
+        # Caller holds the exclusive lock; temp file + rename is atomic for readers
+        tmp = p.with_suffix(f".jsonl.{os.getpid()}.tmp")
+        tmp.write_text("".join(json.dumps(it, ensure_ascii=False) + "\n" for it in items), encoding="utf-8")
+        os.replace(tmp, p)
+
+    def load(self, name: str) -> list:
+        p = self._path(name)
+        if not p.exists():
+            legacy = _load_legacy(name)
+            if legacy is None:
+                return []
+            with _locked(self._lock(name)):
+                if not p.exists():  # one-time migration from <name>.json
+                    self._write_all(p, legacy)
+            return self.load(name)
+
+        with _locked(self._lock(name), exclusive=False):
+            items, torn = self._read(p)
+        if torn:
+            self.compact(name)
+            with _locked(self._lock(name), exclusive=False):
+                items, _ = self._read(p)
+        return items
+
+    def append(self, name: str, items: list) -> None:
+        if not items:
+            return
+        payload = "".join(json.dumps(it, ensure_ascii=False) + "\n" for it in items)
+        p = self._path(name)
+        with _locked(self._lock(name)):
+            # One O_APPEND write per turn: concurrent writers never interleave mid-turn
+            with p.open("a", encoding="utf-8") as f:
+                f.write(payload)
+                f.flush()
+
+    def replace(self, name: str, items: list) -> None:
+        with _locked(self._lock(name)):
+            self._write_all(self._path(name), items)
+
+    def compact(self, name: str, keep_last: Optional[int] = None) -> None:
+        # Read + rewrite under one exclusive lock so no concurrent append is lost
+        p = self._path(name)
+        with _locked(self._lock(name)):
+            if p.exists():
+                items, _ = self._read(p)
+                self._write_all(p, _trim_to_turn(items, keep_last))
+
+    def load_meta(self, name: str) -> dict:
+        p = _session_file(name, ".meta.json")
+        try:
+            return json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+
+    def save_meta(self, name: str, meta: dict) -> None:
+        p = _session_file(name, ".meta.json")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, p)
+
+
+class SqliteSessionStore(SessionStore):
+    def __init__(self, db_path: Optional[Path] = None):
+        self._db_path = db_path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers run alongside a writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            path = self._db_path or _sess_dir() / "sessions.db"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " session TEXT NOT NULL,"
+                " item TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS items_session ON items(session, seq)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (session TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write_txn(self) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE: take the write lock up front, so a read-then-write sees no concurrent append."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def _select(self, conn: sqlite3.Connection, name: str) -> list:
+        return conn.execute("SELECT seq, item FROM items WHERE session = ? ORDER BY seq", (name,)).fetchall()
+
+    def load(self, name: str) -> list:
+        rows = self._select(self._conn(), name)
+        if not rows:
+            legacy = _load_legacy(name)
+            if legacy:
+                with self._write_txn() as conn:
+                    # One-time migration, only if no other process has written the session meanwhile
+                    if not conn.execute("SELECT 1 FROM items WHERE session = ? LIMIT 1", (name,)).fetchone():
+                        conn.executemany(
+                            "INSERT INTO items(session, item) VALUES (?, ?)",
+                            [(name, json.dumps(it, ensure_ascii=False)) for it in legacy],
+                        )
+                    rows = self._select(conn, name)
+        return [json.loads(r[1]) for r in rows]
+
+    def append(self, name: str, items: list) -> None:
+        if not items:
+            return
+        conn = self._conn()
+        with conn:  # one transaction per turn
+            conn.executemany(
+                "INSERT INTO items(session, item) VALUES (?, ?)",
+                [(name, json.dumps(it, ensure_ascii=False)) for it in items],
+            )
+
+    def replace(self, name: str, items: list) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM items WHERE session = ?", (name,))
+            conn.executemany(
+                "INSERT INTO items(session, item) VALUES (?, ?)",
+                [(name, json.dumps(it, ensure_ascii=False)) for it in items],
+            )
+
+    def compact(self, name: str, keep_last: Optional[int] = None) -> None:
+        # Read + delete in one write transaction so no concurrent append is lost
+        with self._write_txn() as conn:
+            rows = self._select(conn, name)
+            kept = _trim_to_turn([json.loads(r[1]) for r in rows], keep_last)
+            if len(kept) < len(rows):
+                cutoff = rows[len(rows) - len(kept)][0] if kept else rows[-1][0] + 1
+                conn.execute("DELETE FROM items WHERE session = ? AND seq < ?", (name, cutoff))
+
+    def load_meta(self, name: str) -> dict:
+        row = self._conn().execute("SELECT data FROM meta WHERE session = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def save_meta(self, name: str, meta: dict) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta(session, data) VALUES (?, ?)",
+                (name, json.dumps(meta, ensure_ascii=False)),
+            )
+
+
+_BACKENDS = {"jsonl": JsonlSessionStore, "sqlite": SqliteSessionStore}
+_stores: dict = {}
+
+
+def get_store(backend: Optional[str] = None) -> SessionStore:
+    key = (backend or os.getenv("SESSION_BACKEND", "jsonl")).lower()
+    if key not in _BACKENDS:
+        raise ValueError(f"Unknown session backend '{key}' (expected one of {sorted(_BACKENDS)})")
+    if key not in _stores:
+        _stores[key] = _BACKENDS[key]()
+    return _stores[key]
+
+
+def _max_items() -> int:
+    return int(os.getenv("SESSION_MAX_ITEMS", "0") or 0)
+
+
+def _load_capped(store: SessionStore, name: str) -> list:
+    items = store.load(name)
+    # Occasional compaction: only when a cap is configured and clearly exceeded
+    max_items = _max_items()
+    if max_items and len(items) > max_items * 1.25:
+        store.compact(name, max_items)
+        items = store.load(name)
+    return items
+
+
+def load_session(name: str) -> list:
+    return _load_capped(get_store(), name)
+
+
+def append_session(name: str, items: list) -> None:
+    """Persist only the items added during this turn."""
+    get_store().append(name, items)
+
 
 def save_session(name: str, messages: list) -> None:
-    _path(name).write_text(json.dumps(messages, ensure_ascii=False, indent=2), encoding="utf-8")
+    """Overwrite the whole history (kept for callers that rewrite sessions)."""
+    get_store().replace(name, messages)
+
+
+def compact_session(name: str, keep_last: Optional[int] = None) -> None:
+    get_store().compact(name, keep_last)
+
+
+def load_session_meta(name: str) -> dict:
+    return get_store().load_meta(name)
+
+
+def save_session_meta(name: str, meta: dict) -> None:
+    get_store().save_meta(name, meta)
+
+
+# ---------------------------------------------------------------------------
+# Hot sessions for long-running processes (app.server)
+# ---------------------------------------------------------------------------
+
+class WriteBehindSessions(SessionStore):
+    """
+    Keeps recently used sessions in memory over a backing store. Loads after
+    the first are served from memory; appends and meta updates are queued
+    and written to the backing store by a background thread every
+    `flush_interval` seconds (and on `close()`), so a turn never waits on
+    disk. At most `max_sessions` histories stay in memory; the least
+    recently used one is flushed and dropped first.
+
+    Another process writing the same sessions won't be seen until the
+    session is evicted: use it where this process owns the sessions.
+    """
+
+    def __init__(self, backing: Optional[SessionStore] = None, flush_interval: float = 1.0, max_sessions: int = 1000):
+        self.backing = backing or get_store()
+        self.flush_interval = flush_interval
+        self.max_sessions = max_sessions
+        self._items: "OrderedDict[str, list]" = OrderedDict()
+        self._meta: dict = {}
+        self._pending: dict = {}       # name -> items appended since the last flush
+        self._pending_meta: dict = {}  # name -> meta saved since the last flush
+        self._compact: set = set()     # names to compact in the backing store on flush
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one flush at a time keeps appends in order
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-write-behind", daemon=True)
+        self._thread.start()
+
+    @property
+    def hot_sessions(self) -> int:
+        return len(self._items)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                pass  # keep the items queued; next tick retries
+
+    def _hot(self, name: str) -> list:
+        """The in-memory history (caller holds _lock); loads it on a miss."""
+        items = self._items.get(name)
+        if items is None:
+            items = self._items[name] = _load_capped(self.backing, name)
+            self._evict()
+        self._items.move_to_end(name)
+        return items
+
+    def _evict(self) -> None:
+        while len(self._items) > self.max_sessions:
+            name = next(iter(self._items))
+            if name in self._pending or name in self._pending_meta:
+                break  # unflushed: keep until the next flush writes it
+            del self._items[name]
+            self._meta.pop(name, None)
+
+    def load(self, name: str) -> list:
+        with self._lock:
+            return list(self._hot(name))
+
+    def append(self, name: str, items: list) -> None:
+        if not items:
+            return
+        with self._lock:
+            hot = self._hot(name)
+            hot.extend(items)
+            self._pending.setdefault(name, []).extend(items)
+            max_items = _max_items()
+            if max_items and len(hot) > max_items * 1.25:
+                self._items[name] = _trim_to_turn(hot, max_items)
+                self._compact.add(name)
+
+    def replace(self, name: str, items: list) -> None:
+        self.flush()
+        self.backing.replace(name, items)
+        with self._lock:
+            self._items[name] = list(items)
+            self._evict()
+
+    def load_meta(self, name: str) -> dict:
+        with self._lock:
+            if name in self._meta:
+                return dict(self._meta[name])
+        meta = self.backing.load_meta(name)
+        with self._lock:
+            return dict(self._meta.setdefault(name, meta))
+
+    def save_meta(self, name: str, meta: dict) -> None:
+        with self._lock:
+            self._meta[name] = dict(meta)
+            self._pending_meta[name] = dict(meta)
+
+    def flush(self) -> None:
+        """Write everything queued so far to the backing store."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                pending_meta, self._pending_meta = self._pending_meta, {}
+                compact, self._compact = self._compact, set()
+            try:
+                for name in list(pending):
+                    self.backing.append(name, pending[name])
+                    del pending[name]
+                    if name in compact:
+                        compact.discard(name)
+                        self.backing.compact(name, _max_items())
+                for name in list(pending_meta):
+                    self.backing.save_meta(name, pending_meta[name])
+                    del pending_meta[name]
+            except Exception:
+                # Put back what wasn't written (in front of anything newer)
+                with self._lock:
+                    for name, items in pending.items():
+                        self._pending[name] = items + self._pending.get(name, [])
+                    for name, meta in pending_meta.items():
+                        self._pending_meta.setdefault(name, meta)
+                    self._compact |= compact
+                raise
+            with self._lock:
+                self._evict()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.flush()
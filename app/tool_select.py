@@ -0,0 +1,113 @@
+# app/tool_select.py
+"""
+Pick the tools worth sending for a prompt.
+
+Every tool spec costs input tokens on every call, so with a large registry
+we only send the top-k specs most relevant to the prompt. Relevance is BM25
+over each tool's name, description and parameter names/descriptions; the
+term vectors are computed once per registry (from the manifest specs, no tool
+imports). Pinned tools are always included. If nothing matches at all (e.g.
+"what can you do?") every tool is sent, so recall never drops to zero.
+"""
+import logging
+import math
+import re
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+log = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOP = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "e", "for", "from", "g", "i", "in", "is",
+    "it", "me", "my", "of", "on", "or", "the", "to", "what", "whats", "with", "you",
+    # meta words that describe tool use itself, not a topic
+    "able", "call", "can", "do", "function", "please", "tell", "this", "tool", "use",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    out = []
+    for w in _WORD.findall(text.lower().replace("_", " ")):
+        if w in _STOP:
+            continue
+        if len(w) > 3 and w.endswith("s") and not w.endswith("ss"):
+            w = w[:-1]  # crude plural folding: "rates" → "rate"
+        out.append(w)
+    return out
+
+
+def _spec_text(spec: dict) -> str:
+    parts = [spec.get("name", ""), spec.get("description", "")]
+
+    def walk(schema: dict) -> None:
+        for pname, prop in (schema.get("properties") or {}).items():
+            parts.append(pname)
+            parts.append(prop.get("description", ""))
+            parts.extend(str(v) for v in prop.get("enum", []))
+            if isinstance(prop.get("items"), dict):
+                walk(prop["items"])
+            walk(prop)
+
+    walk(spec.get("parameters") or {})
+    return " ".join(parts)
+
+
+class ToolIndex:
+    """BM25 index over tool specs (k1/b are the usual defaults)."""
+
+    def __init__(self, specs: List[dict], k1: float = 1.2, b: float = 0.75):
+        self.specs = specs
+        self.k1, self.b = k1, b
+        self.docs = [Counter(tokenize(_spec_text(s))) for s in specs]
+        self.lengths = [sum(d.values()) for d in self.docs]
+        self.avg_len = (sum(self.lengths) / len(self.lengths)) if specs else 0.0
+        df = Counter(term for d in self.docs for term in d)
+        n = len(specs)
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def scores(self, query: str) -> List[float]:
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        out = []
+        for doc, length in zip(self.docs, self.lengths):
+            s = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_len or 1))
+            for t in terms:
+                tf = doc.get(t)
+                if tf:
+                    s += self.idf[t] * tf * (self.k1 + 1) / (tf + norm)
+            out.append(s)
+        return out
+
+
+_INDEXES: dict = {}
+
+
+def _index_for(specs: List[dict]) -> ToolIndex:
+    key = tuple(s.get("name") for s in specs)
+    index = _INDEXES.get(key)
+    if index is None:
+        index = _INDEXES[key] = ToolIndex(specs)
+    return index
+
+
+def select_tools(prompt: str, specs: List[dict], top_k: int, pinned: Iterable[str] = ()) -> Tuple[list, list]:
+    """
+    Return (selected_specs, pruned_names). Selected specs keep registry order
+    so the tools prefix of the request stays byte-stable between prompts.
+    """
+    if not top_k or top_k >= len(specs):
+        return list(specs), []
+    scores = _index_for(specs).scores(prompt)
+    pinned = set(pinned)
+    if not any(scores):
+        keep = {s["name"] for s in specs}
+    else:
+        ranked = sorted(range(len(specs)), key=lambda i: scores[i], reverse=True)
+        keep = {specs[i]["name"] for i in ranked[:top_k] if scores[i] > 0}
+    keep |= pinned
+    selected = [s for s in specs if s["name"] in keep]
+    pruned = [s["name"] for s in specs if s["name"] not in keep]
+    if pruned:
+        log.info("tool selection: kept=%s pruned=%s", [s["name"] for s in selected], pruned)
+    return selected, pruned
@@ -1,21 +1,16 @@
-from .weather import GET_WEATHER_SCHEMA, get_weather
-from .currency import GET_CURRENCY_RATE_SCHEMA, get_currency_rate   # NEW
-from .time_api import GET_TIME_SCHEMA, get_time                     # NEW
-#from .hello import GET_HELLO_SCHEMA, say_hello
-#from .ip_api import GET_IP_GEO_SCHEMA, get_ip_geo
+# Tool registry. Tools register with @tool (see registry.py); specs come from
+# the prebuilt manifest.json, and each implementation is imported on first use.
+# Add/edit a tool → `python -m app.tools` (also rebuilt automatically
+# when a tool module is newer than the manifest).
+from .cache import FOREVER, ToolCache
+from .registry import LazyFunctions, load_manifest, tool
 
-TOOL_SPECS_RESPONSES = [
-    {"type": "function", **GET_WEATHER_SCHEMA},
-    {"type": "function", **GET_CURRENCY_RATE_SCHEMA},  # NEW
-    {"type": "function", **GET_TIME_SCHEMA},           # NEW
-    #{"type": "function", **GET_HELLO_SCHEMA},
-    #{"type": "function", **GET_IP_GEO_SCHEMA},
-]
+_MANIFEST = load_manifest()
 
-FUNCTIONS = {
-    "get_weather": get_weather,
-    "get_currency_rate": get_currency_rate,  # NEW
-    "get_time": get_time,                    # NEW
-    #"say_hello": say_hello,
-    #"get_ip_geo": get_ip_geo,
-}
+TOOL_SPECS_RESPONSES = [entry["spec"] for entry in _MANIFEST]
+
+# Shared result cache: in-memory LRU, plus on-disk when TOOL_CACHE_DIR is set
+TOOL_CACHE = ToolCache()
+
+# name → function; modules are imported (and results cached) on first dispatch
+FUNCTIONS = LazyFunctions(_MANIFEST, TOOL_CACHE)
@@ -0,0 +1,5 @@
+# python -m app.tools → rebuild manifest.json from the @tool-decorated functions
+from .registry import MANIFEST_PATH, build_manifest
+
+entries = build_manifest()
+print(f"Wrote {MANIFEST_PATH} with {len(entries)} tools: {', '.join(e['name'] for e in entries)}")
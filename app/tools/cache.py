@@ -0,0 +1,166 @@
+# app/tools/cache.py
+"""
+TTL + LRU result cache for the tool dispatcher.
+
+Keys are the tool name plus its arguments, normalized and serialized
+canonically, so {"timezone": " Europe/Stockholm"} and
+{"timezone": "Europe/Stockholm"} hit the same entry. Each tool declares its
+own TTL (seconds, or FOREVER). Failed results (`ok: False`) are never stored.
+
+Tiers:
+  * in-memory LRU (per process, always on)
+  * on-disk JSON files shared across CLI runs — set TOOL_CACHE_DIR to enable
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+FOREVER = float("inf")  # TTL for static data (mock tables)
+
+_MISSING = object()
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def cache_key(name: str, args: dict) -> str:
+    canon = json.dumps(_normalize(args), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return f"{name}:{canon}"
+
+
+class ToolCache:
+    def __init__(self, max_entries: int = 1024, disk_dir: Optional[Path] = None):
+        self.max_entries = max_entries
+        self._disk_dir = disk_dir
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    # ---- tiers -------------------------------------------------------------
+
+    @property
+    def disk_dir(self) -> Optional[Path]:
+        # Read lazily so a TOOL_CACHE_DIR from .env (loaded after import) applies
+        if self._disk_dir is not None:
+            return self._disk_dir
+        env = os.getenv("TOOL_CACHE_DIR")
+        return Path(env) if env else None
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        d = self.disk_dir
+        if d is None:
+            return None
+        return d / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        with self._lock:
+            self._mem[key] = (expires_at, value)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or the module-private _MISSING sentinel."""
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._mem.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                del self._mem[key]
+
+        p = self._disk_path(key)
+        if p is not None and p.exists():
+            try:
+                data = json.loads(p.read_text(encoding="utf-8"))
+                expires_at = FOREVER if data["expires_at"] is None else data["expires_at"]
+                if expires_at > now:
+                    self._remember(key, expires_at, data["value"])
+                    with self._lock:
+                        self.stats["disk_hits"] += 1
+                    return data["value"]
+                p.unlink(missing_ok=True)
+            except Exception:
+                pass  # unreadable entry == miss
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return _MISSING
+
+    def put(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, value)
+        with self._lock:
+            self.stats["stores"] += 1
+
+        p = self._disk_path(key)
+        if p is None:
+            return
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            payload = {"key": key, "expires_at": None if ttl == FOREVER else expires_at, "value": value}
+            tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, p)  # atomic: readers never see a half-written entry
+        except Exception:
+            pass  # the disk tier is best-effort
+
+    def invalidate(self, name: str) -> None:
+        """Drop every cached result of one tool (memory and disk tiers)."""
+        prefix = f"{name}:"
+        with self._lock:
+            for key in [k for k in self._mem if k.startswith(prefix)]:
+                del self._mem[key]
+        d = self.disk_dir
+        if d is None or not d.exists():
+            return
+        for p in d.glob("*.json"):
+            try:
+                if json.loads(p.read_text(encoding="utf-8")).get("key", "").startswith(prefix):
+                    p.unlink(missing_ok=True)
+            except Exception:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            for k in self.stats:
+                self.stats[k] = 0
+
+    # ---- dispatcher integration -------------------------------------------
+
+    def wrap(self, name: str, fn: Callable, ttl: float) -> Callable:
+        """Return `fn` with results cached for `ttl` seconds (0 disables)."""
+        if not ttl or inspect.iscoroutinefunction(fn):
+            return fn
+
+        @functools.wraps(fn)
+        def cached(**kwargs):
+            key = cache_key(name, kwargs)
+            hit = self.get(key)
+            if hit is not _MISSING:
+                return hit
+            result = fn(**kwargs)
+            if isinstance(result, dict) and result.get("ok", True) is not False:
+                self.put(key, result, ttl)
+            return result
+
+        return cached
@@ -1,14 +1,23 @@
 # app/tools/currency.py
+import math
 from typing import Dict
 
+from .fx_matrix import RateMatrix
+from .registry import tool
+
 # Mock FX table so the workshop runs without external APIs
-# Rates are illustrative, not real-time
+# Rates are illustrative, not real-time. GBP and NOK are only quoted against
+# one currency: every other pair with them is triangulated by the matrix.
 _FAKE_RATES: Dict[str, Dict[str, float]] = {
     "SEK": {"EUR": 0.09, "USD": 0.10, "SEK": 1.0},
-    "EUR": {"SEK": 11.1,  "USD": 1.08, "EUR": 1.0},
+    "EUR": {"SEK": 11.1,  "USD": 1.08, "EUR": 1.0, "GBP": 0.85},
     "USD": {"SEK": 10.2,  "EUR": 0.92, "USD": 1.0},
+    "NOK": {"SEK": 0.98},
 }
 
+# Dense matrix with all cross rates precomputed from the table above
+_MATRIX = RateMatrix(_FAKE_RATES)
+
 GET_CURRENCY_RATE_SCHEMA = {
     "name": "get_currency_rate",
     "description": "Return a mock FX rate from base to quote (no external API).",
@@ -24,12 +33,90 @@ GET_CURRENCY_RATE_SCHEMA = {
     "strict": True,
 }
 
+CONVERT_CURRENCY_BATCH_SCHEMA = {
+    "name": "convert_currency_batch",
+    "description": (
+        "Convert many amounts between currencies in ONE call using mock FX rates "
+        "(cross rates are derived when a pair isn't quoted directly). "
+        "Use this instead of repeated get_currency_rate calls, e.g. '100 SEK into EUR, USD and GBP'."
+    ),
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "description": "Conversions to perform.",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "base": {"type": "string", "description": "3-letter currency to convert from."},
+                        "quote": {"type": "string", "description": "3-letter currency to convert to."},
+                        "amount": {"type": "number", "description": "Amount in the base currency."},
+                    },
+                    "required": ["base", "quote", "amount"],
+                    "additionalProperties": False,
+                },
+            }
+        },
+        "required": ["items"],
+        "additionalProperties": False
+    },
+    "strict": True,
+}
+
+# Mock table never changes → cache results for the life of the cache
+GET_CURRENCY_RATE_CACHE_TTL = float("inf")
+CONVERT_CURRENCY_BATCH_CACHE_TTL = float("inf")
+
+
+def update_rates(rates: Dict[str, Dict[str, float]]) -> None:
+    """
+    Merge new quotes {base: {quote: rate}} (e.g. from a feed in a long-running
+    process). Cross rates update incrementally; cached currency answers are dropped.
+    """
+    _MATRIX.update(rates)
+    from . import TOOL_CACHE
+    TOOL_CACHE.invalidate("get_currency_rate")
+    TOOL_CACHE.invalidate("convert_currency_batch")
+
+
+@tool(GET_CURRENCY_RATE_SCHEMA, cache_ttl=GET_CURRENCY_RATE_CACHE_TTL)
 def get_currency_rate(base: str, quote: str) -> dict:
     b = (base or "").upper().strip()
     q = (quote or "").upper().strip()
-    if b not in _FAKE_RATES:
+    if b not in _MATRIX.index:
         return {"ok": False, "message": f"Unknown base currency '{base}'"}
-    rate = _FAKE_RATES[b].get(q)
-    if rate is None:
+    rates, hops = _MATRIX.lookup([(b, q)])
+    if math.isnan(rates[0]):
         return {"ok": False, "message": f"No rate for {b}->{q}"}
-    return {"ok": True, "base": b, "quote": q, "rate": rate}
+    result = {"ok": True, "base": b, "quote": q, "rate": round(float(rates[0]), 6)}
+    if hops[0] > 1:
+        result["derived"] = True  # triangulated through other currencies
+    return result
+
+
+@tool(CONVERT_CURRENCY_BATCH_SCHEMA, cache_ttl=CONVERT_CURRENCY_BATCH_CACHE_TTL)
+def convert_currency_batch(items: list) -> dict:
+    pairs = [((it.get("base") or "").upper().strip(), (it.get("quote") or "").upper().strip())
+             for it in items]
+    rates, hops = _MATRIX.lookup(pairs)
+    amounts = [float(it.get("amount") or 0) for it in items]
+    converted = rates * amounts  # one vectorized multiply for the whole batch
+
+    results = []
+    for (b, q), amount, rate, hop, value in zip(pairs, amounts, rates, hops, converted):
+        if math.isnan(rate):
+            unknown = b if b not in _MATRIX.index else q if q not in _MATRIX.index else None
+            message = f"Unknown currency '{unknown}'" if unknown else f"No rate for {b}->{q}"
+            results.append({"ok": False, "base": b, "quote": q, "message": message})
+            continue
+        results.append({
+            "ok": True,
+            "base": b,
+            "quote": q,
+            "amount": amount,
+            "rate": round(float(rate), 6),
+            "converted": round(float(value), 4),
+            "derived": bool(hop > 1),
+        })
+    return {"ok": any(r["ok"] for r in results), "results": results}
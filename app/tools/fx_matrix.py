@@ -0,0 +1,124 @@
+# app/tools/fx_matrix.py
+"""
+Dense FX rate matrix with precomputed cross rates.
+
+rates[i, j] converts 1 unit of codes[i] into codes[j]. Pairs that aren't
+quoted directly are triangulated through intermediate currencies along the
+path with the fewest hops (all-pairs shortest path, vectorized per pivot).
+Lookups for many pairs are one NumPy fancy-index operation.
+
+Updates are incremental where the math allows it:
+  * a NEW pair (or a new currency) is folded in with one O(n²) relaxation
+    through that edge — no full rebuild
+  * CHANGING an already-quoted rate marks the closure dirty; it is rebuilt
+    once, lazily, on the next lookup (however many rates changed)
+"""
+import threading
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+
+class RateMatrix:
+    def __init__(self, table: Dict[str, Dict[str, float]]):
+        self.codes: list = []
+        self.index: Dict[str, int] = {}
+        self._direct = np.full((0, 0), np.nan)   # quoted rates only (inverses filled in)
+        self._quoted = np.zeros((0, 0), dtype=bool)  # True where the table gave the rate explicitly
+        self._rates = np.full((0, 0), np.nan)    # closure: best-path cross rates
+        self._hops = np.full((0, 0), np.inf)
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.update(table)
+
+    # ---- building ------------------------------------------------------------
+
+    def _grow(self, code: str) -> int:
+        n = len(self.codes)
+        self.codes.append(code)
+        self.index[code] = n
+
+        def pad(a, fill):
+            out = np.full((n + 1, n + 1), fill, dtype=a.dtype)
+            out[:n, :n] = a
+            return out
+
+        self._direct = pad(self._direct, np.nan)
+        self._quoted = pad(self._quoted, False)
+        self._rates = pad(self._rates, np.nan)
+        self._hops = pad(self._hops, np.inf)
+        self._direct[n, n] = self._rates[n, n] = 1.0
+        self._hops[n, n] = 0
+        return n
+
+    def _relax_through(self, u: int, v: int) -> None:
+        """Fold the (new) edge u→v into the closure: paths i→u→v→j."""
+        via = self._hops[:, u, None] + 1 + self._hops[None, v, :]
+        better = via < self._hops
+        if better.any():
+            cand = self._rates[:, u, None] * self._direct[u, v] * self._rates[None, v, :]
+            self._rates = np.where(better, cand, self._rates)
+            self._hops = np.where(better, via, self._hops)
+
+    def _rebuild(self) -> None:
+        """Full Floyd–Warshall on hop counts, carrying the rate product along."""
+        known = ~np.isnan(self._direct)
+        hops = np.where(known, 1.0, np.inf)
+        np.fill_diagonal(hops, 0)
+        rates = self._direct.copy()
+        for k in range(len(self.codes)):
+            via = hops[:, k, None] + hops[None, k, :]
+            better = via < hops
+            if better.any():
+                rates = np.where(better, rates[:, k, None] * rates[None, k, :], rates)
+                hops = np.where(better, via, hops)
+        self._rates, self._hops = rates, hops
+        self._dirty = False
+
+    def _set_edge(self, i: int, j: int, rate: float, quoted: bool) -> None:
+        if quoted:
+            self._quoted[i, j] = True
+        elif self._quoted[i, j]:
+            return  # never let an implied inverse overwrite a quoted rate
+        old = self._direct[i, j]
+        self._direct[i, j] = rate
+        if np.isnan(old):
+            if not self._dirty:
+                self._relax_through(i, j)
+        elif old != rate:
+            self._dirty = True
+
+    def update(self, table: Dict[str, Dict[str, float]]) -> None:
+        """Merge quoted rates {base: {quote: rate}} into the matrix."""
+        with self._lock:
+            for base, row in table.items():
+                for quote, rate in row.items():
+                    b, q = base.upper(), quote.upper()
+                    i = self.index.get(b)
+                    i = self._grow(b) if i is None else i
+                    j = self.index.get(q)
+                    j = self._grow(q) if j is None else j
+                    if i == j or not rate:
+                        continue
+                    self._set_edge(i, j, float(rate), quoted=True)
+                    self._set_edge(j, i, 1.0 / float(rate), quoted=False)
+
+    # ---- lookups -------------------------------------------------------------
+
+    def lookup(self, pairs: Iterable[Tuple[str, str]]):
+        """
+        Vectorized lookup. Returns (rates, hops) arrays aligned with `pairs`;
+        unknown codes or unreachable pairs give rate NaN.
+        """
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            pairs = list(pairs)
+            bi = np.array([self.index.get(b, -1) for b, _ in pairs], dtype=int)
+            qi = np.array([self.index.get(q, -1) for _, q in pairs], dtype=int)
+            valid = (bi >= 0) & (qi >= 0)
+            rates = np.full(len(pairs), np.nan)
+            hops = np.full(len(pairs), np.inf)
+            rates[valid] = self._rates[bi[valid], qi[valid]]
+            hops[valid] = self._hops[bi[valid], qi[valid]]
+            return rates, hops
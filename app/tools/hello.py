@@ -1,4 +1,6 @@
-"""GET_HELLO_SCHEMA = {
+"""from .registry import tool
+
+GET_HELLO_SCHEMA = {
     "name": "say_hello",
     "description": "Return a friendly greeting.",
     "parameters": {
@@ -12,5 +14,9 @@
     "strict": True,
 }
 
+# Pure function of its input
+GET_HELLO_CACHE_TTL = float("inf")
+
+@tool(GET_HELLO_SCHEMA, cache_ttl=GET_HELLO_CACHE_TTL)
 def say_hello(name: str) -> dict:
     return {"ok": True, "message": f"Hello, {name}!"}"""
\ No newline at end of file
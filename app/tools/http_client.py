@@ -0,0 +1,182 @@
+# app/tools/http_client.py
+"""
+Shared HTTP client for network-backed tools.
+
+* one keep-alive `requests.Session` (connection pool) per host
+* separate connect / read timeouts
+* jittered exponential retries on connection errors (incl. connect
+  timeouts) and 5xx; a read timeout fails at once, so one call never takes
+  much more than HTTP_READ_TIMEOUT
+* a per-host circuit breaker: after N consecutive failures the host is
+  skipped for a cooldown and calls fail fast with a structured error
+
+Tools opt in with one call and get a dict back, never an exception:
+
+    from .http_client import get_json
+    res = get_json("https://www.timeapi.io/api/Time/current/zone", params={"timeZone": tz})
+    if not res["ok"]:
+        return {**res, "timezone": tz}
+    data = res["data"]
+
+Defaults can be tuned with env vars: HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+HTTP_RETRIES, HTTP_BREAKER_THRESHOLD, HTTP_BREAKER_COOLDOWN.
+"""
+import os
+import random
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {500, 502, 503, 504}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class CircuitBreaker:
+    """closed → (threshold failures) → open → (cooldown) → half-open → closed/open"""
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._trial_running:
+                return False
+            self._trial_running = True  # half-open: let exactly one probe through
+            return True
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            self._trial_running = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class HttpClient:
+    def __init__(
+        self,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff: float = 0.25,
+        breaker_threshold: Optional[int] = None,
+        breaker_cooldown: Optional[float] = None,
+        pool_size: int = 10,
+    ):
+        self.connect_timeout = connect_timeout or _env_float("HTTP_CONNECT_TIMEOUT", 3.05)
+        self.read_timeout = read_timeout or _env_float("HTTP_READ_TIMEOUT", 10.0)
+        self.retries = int(_env_float("HTTP_RETRIES", 2)) if retries is None else retries
+        self.backoff = backoff
+        self.breaker_threshold = breaker_threshold or int(_env_float("HTTP_BREAKER_THRESHOLD", 5))
+        self.breaker_cooldown = breaker_cooldown or _env_float("HTTP_BREAKER_COOLDOWN", 30.0)
+        self.pool_size = pool_size
+        self._sessions: dict = {}
+        self._breakers: dict = {}
+        self._lock = threading.Lock()
+
+    def _for_host(self, host: str):
+        with self._lock:
+            if host not in self._sessions:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                self._sessions[host] = s
+                self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self._sessions[host], self._breakers[host]
+
+    def get_json(self, url: str, params: Optional[dict] = None) -> dict:
+        """
+        GET `url` and decode JSON. Returns {"ok": True, "status", "data"} or
+        {"ok": False, "error", ...}; never raises.
+        """
+        host = urlsplit(url).netloc
+        session, breaker = self._for_host(host)
+        if not breaker.allow():
+            return {
+                "ok": False,
+                "error": f"Circuit open for {host}; retry in {breaker.retry_in():.0f}s",
+                "circuit_open": True,
+            }
+
+        failure: dict = {}
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+            try:
+                r = session.get(url, params=params, timeout=(self.connect_timeout, self.read_timeout))
+            except requests.ConnectionError as e:  # incl. ConnectTimeout: nothing was sent, cheap to retry
+                failure = {"ok": False, "error": f"Network error: {e}"}
+                continue
+            except requests.RequestException as e:
+                # Read timeouts and the like: waiting again would blow the caller's time budget
+                failure = {"ok": False, "error": f"Network error: {e}"}
+                break
+
+            if r.status_code in RETRY_STATUSES:
+                failure = {"ok": False, "status": r.status_code, "error": f"HTTP {r.status_code}",
+                           "hint": r.text[:200]}
+                continue
+
+            # Anything else is a definitive answer from a healthy host
+            breaker.record(True)
+            if r.status_code != 200:
+                return {"ok": False, "status": r.status_code, "error": f"HTTP {r.status_code}",
+                        "hint": r.text[:200]}
+            try:
+                return {"ok": True, "status": r.status_code, "data": r.json()}
+            except ValueError as e:
+                return {"ok": False, "status": r.status_code, "error": f"Invalid JSON: {e}"}
+
+        breaker.record(False)
+        return failure
+
+    def close(self) -> None:
+        with self._lock:
+            for s in self._sessions.values():
+                s.close()
+            self._sessions.clear()
+            self._breakers.clear()
+
+
+_default_client: Optional[HttpClient] = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    """Process-wide client shared by all tools (built on first use, after .env is loaded)."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def get_json(url: str, params: Optional[dict] = None) -> dict:
+    return default_client().get_json(url, params=params)
@@ -1,4 +1,5 @@
-"""import requests
+"""from .http_client import get_json
+from .registry import tool
 
 GET_IP_GEO_SCHEMA = {
     "name": "get_ip_geo",
@@ -14,19 +15,21 @@ GET_IP_GEO_SCHEMA = {
     "strict": True,
 }
 
+# Geolocation of an address rarely changes: cache for a week
+GET_IP_GEO_CACHE_TTL = 7 * 24 * 3600
+
+@tool(GET_IP_GEO_SCHEMA, cache_ttl=GET_IP_GEO_CACHE_TTL)
 def get_ip_geo(ip: str) -> dict:
-    try:
-        r = requests.get(f"https://ipapi.co/{ip}/json/", timeout=10)
-        if r.status_code != 200:
-            return {"ok": False, "error": f"HTTP {r.status_code}"}
-        data = r.json()
-        return {
-            "ok": True,
-            "ip": ip,
-            "country": data.get("country_name"),
-            "city": data.get("city"),
-            "latitude": data.get("latitude"),
-            "longitude": data.get("longitude"),
-        }
-    except Exception as e:
-        return {"ok": False, "error": str(e)}"""
\ No newline at end of file
+    # Shared pooled client: retries, timeouts and circuit breaker included
+    res = get_json(f"https://ipapi.co/{ip}/json/")
+    if not res["ok"]:
+        return {**res, "ip": ip}
+    data = res["data"]
+    return {
+        "ok": True,
+        "ip": ip,
+        "country": data.get("country_name"),
+        "city": data.get("city"),
+        "latitude": data.get("latitude"),
+        "longitude": data.get("longitude"),
+    }"""
\ No newline at end of file
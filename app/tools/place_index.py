@@ -0,0 +1,125 @@
+# app/tools/place_index.py
+"""
+Lookup index for place names: exact → alias → fuzzy.
+
+* names are folded before indexing and lookup: accents stripped
+  ("Malmö" → "malmo"), case-folded, punctuation dropped, and a trailing
+  ", country" qualifier removed ("Stockholm, SE" → "stockholm")
+* aliases / exonyms ("Göteborg" → Gothenburg) map onto the same entry
+* misspellings are matched through a trigram inverted index (cheap
+  candidate set even with hundreds of thousands of places) and ranked by
+  edit distance
+
+Large data files can be indexed once and pickled next to the file
+(`PlaceIndex.from_csv(path, cache=True)`).
+"""
+import csv
+import os
+import pickle
+import re
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Letters NFKD doesn't decompose into ASCII
+_FOLD = str.maketrans({"ø": "o", "æ": "ae", "œ": "oe", "ß": "ss", "đ": "d", "ł": "l", "þ": "th", "ı": "i"})
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(name: str) -> str:
+    name = (name or "").split(",")[0]  # "Stockholm, SE" → "Stockholm"
+    name = unicodedata.normalize("NFKD", name.casefold().translate(_FOLD))
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", name).strip()
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up (returning limit + 1) once it must exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i]
+        for j, cb in enumerate(b, start=1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class PlaceIndex:
+    def __init__(self):
+        self.records: List[dict] = []        # id → record (must include "name")
+        self.keys: Dict[str, int] = {}       # folded name or alias → id
+        self.grams: Dict[str, List[str]] = {}  # trigram → folded keys containing it
+
+    def add(self, record: dict, aliases: Tuple[str, ...] = ()) -> None:
+        rid = len(self.records)
+        self.records.append(record)
+        for name in (record["name"], *aliases):
+            key = normalize(name)
+            if not key or key in self.keys:
+                continue
+            self.keys[key] = rid
+            for g in _trigrams(key):
+                self.grams.setdefault(g, []).append(key)
+
+    def lookup(self, name: str, max_candidates: int = 20) -> Tuple[Optional[dict], str]:
+        """Return (record, how) where how is 'exact', 'fuzzy' or 'none'."""
+        key = normalize(name)
+        if not key:
+            return None, "none"
+        rid = self.keys.get(key)
+        if rid is not None:
+            return self.records[rid], "exact"
+
+        # Candidates sharing the most trigrams, then the closest by edit distance
+        grams = _trigrams(key)
+        shared = Counter(k for g in grams for k in self.grams.get(g, ()))
+        limit = max(1, len(key) // 4)
+        best, best_dist = None, limit + 1
+        for cand, _ in shared.most_common(max_candidates):
+            d = _edit_distance(key, cand, limit)
+            if d < best_dist:
+                best, best_dist = cand, d
+        if best is None:
+            return None, "none"
+        return self.records[self.keys[best]], "fuzzy"
+
+    # ---- loading -------------------------------------------------------------
+
+    @classmethod
+    def from_csv(cls, path: Path, cache: bool = True) -> "PlaceIndex":
+        """
+        CSV columns: name,c,f,aliases  (aliases separated by '|').
+        With cache=True the built index is pickled to <path>.idx.pickle and
+        reused while it is newer than the CSV.
+        """
+        path = Path(path)
+        pickled = path.with_name(path.name + ".idx.pickle")
+        if cache and pickled.exists() and pickled.stat().st_mtime >= path.stat().st_mtime:
+            with pickled.open("rb") as f:
+                return pickle.load(f)
+
+        index = cls()
+        with path.open(encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                aliases = tuple(a for a in (row.get("aliases") or "").split("|") if a)
+                index.add({"name": row["name"], "c": float(row["c"]), "f": float(row["f"])}, aliases)
+
+        if cache:
+            try:
+                tmp = pickled.with_suffix(f".{os.getpid()}.tmp")
+                with tmp.open("wb") as f:
+                    pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, pickled)
+            except OSError:
+                pass
+        return index
@@ -0,0 +1,145 @@
+# app/tools/registry.py
+"""
+Tool registry: discovery at build time, lazy imports at run time.
+
+Tools register themselves with a decorator:
+
+    @tool(GET_WEATHER_SCHEMA, cache_ttl=GET_WEATHER_CACHE_TTL)
+    def get_weather(city: str, unit: str = "c") -> dict: ...
+
+`python -m app.tools` imports every module in app/tools (plus any
+installed package exposing a "workshop.tools" entry point), collects the
+decorated functions and writes manifest.json: the specs to send to the model
+and where each implementation lives. At run time only that JSON is read, so
+schemas go to the model without importing any tool, and a tool's module (and
+its heavy deps, e.g. requests) is imported on its first dispatch.
+
+The manifest records a hash of the tool modules' source. If they changed
+since it was built, load_manifest warns and discovers the tools in memory
+(importing them); the file itself is only written by `python -m app.tools`.
+"""
+import hashlib
+import importlib
+import json
+import logging
+import os
+import pkgutil
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Callable
+
+from .cache import FOREVER, ToolCache
+from .validation import compile_validators, with_validation
+
+TOOLS_DIR = Path(__file__).resolve().parent
+MANIFEST_PATH = TOOLS_DIR / "manifest.json"
+ENTRY_POINT_GROUP = "workshop.tools"
+
+# Support modules that never define tools (skip them during discovery)
+_INFRA_MODULES = {"cache", "fx_matrix", "http_client", "place_index", "registry", "validation"}
+
+log = logging.getLogger(__name__)
+
+# name -> manifest entry; filled by @tool while modules are being imported
+_DISCOVERED: dict = {}
+
+
+def tool(schema: dict, cache_ttl: float = 0) -> Callable:
+    """Register a function as a tool. `cache_ttl`: seconds, FOREVER, or 0 (no caching)."""
+    def decorator(fn: Callable) -> Callable:
+        _DISCOVERED[schema["name"]] = {
+            "name": schema["name"],
+            "module": fn.__module__,
+            "function": fn.__name__,
+            # JSON has no infinity: null means "cache forever"
+            "cache_ttl": None if cache_ttl == FOREVER else cache_ttl,
+            "spec": {"type": "function", **schema},
+        }
+        return fn
+    return decorator
+
+
+def discover() -> list:
+    """Import all tool modules and entry points; return manifest entries in a stable order."""
+    for info in pkgutil.iter_modules([str(TOOLS_DIR)]):
+        if info.name not in _INFRA_MODULES and not info.name.startswith("_"):
+            importlib.import_module(f"{__package__}.{info.name}")
+    try:
+        from importlib.metadata import entry_points
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            ep.load()  # importing the target runs its @tool decorators
+    except Exception:
+        pass
+    return [_DISCOVERED[name] for name in sorted(_DISCOVERED)]
+
+
+def sources_hash() -> str:
+    """Hash of the tool modules' source (line endings normalized, so checkouts agree)."""
+    h = hashlib.sha256()
+    for p in sorted(TOOLS_DIR.glob("*.py")):
+        if p.stem not in _INFRA_MODULES:
+            h.update(p.name.encode("utf-8") + b"\0" + p.read_bytes().replace(b"\r\n", b"\n") + b"\0")
+    return h.hexdigest()
+
+
+def build_manifest(path: Path = MANIFEST_PATH) -> list:
+    entries = discover()
+    data = {"sources": sources_hash(), "tools": entries}
+    # Temp file + rename: processes starting meanwhile read the old or the new manifest, never half of one
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+    return entries
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> list:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        log.warning("Can't read %s (%s); discovering tools by importing them. Run `python -m app.tools`.", path, e)
+        return discover()
+    if data.get("sources") != sources_hash():
+        log.warning("%s is out of date with app/tools; discovering tools by importing them. Run `python -m app.tools`.", path)
+        return discover()
+    return data["tools"]
+
+
+class LazyFunctions(Mapping):
+    """
+    name → callable, importing each tool's module on first lookup and
+    wrapping it with argument validation (compiled from the specs up front)
+    and the shared result cache.
+    """
+
+    def __init__(self, entries: list, cache: ToolCache):
+        self._entries = {e["name"]: e for e in entries}
+        self._validators = compile_validators(entries)
+        self._loaded: dict = {}
+        self._cache = cache
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> Callable:
+        fn = self._loaded.get(name)
+        if fn is not None:
+            return fn
+        entry = self._entries[name]  # KeyError for unknown tools, like a dict
+        with self._lock:
+            if name not in self._loaded:
+                impl = getattr(importlib.import_module(entry["module"]), entry["function"])
+                ttl = FOREVER if entry["cache_ttl"] is None else entry["cache_ttl"]
+                # Validate first so the cache is keyed by clean, coerced arguments
+                self._loaded[name] = with_validation(self._cache.wrap(name, impl, ttl), self._validators[name])
+            return self._loaded[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self._entries  # without importing the tool
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
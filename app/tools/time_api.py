@@ -1,9 +1,16 @@
 # app/tools/time_api.py
-import requests
+import difflib
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo, available_timezones
+
+from .registry import tool
 
 GET_TIME_SCHEMA = {
     "name": "get_time",
-    "description": "Return the current date/time for an IANA timezone via timeapi.io.",
+    "description": "Return the current date/time for an IANA timezone.",
     "parameters": {
         "type": "object",
         "properties": {
@@ -18,40 +25,102 @@ GET_TIME_SCHEMA = {
     "strict": True,
 }
 
+# The clock moves: only reuse a lookup for a few seconds
+GET_TIME_CACHE_TTL = 5
+
+@lru_cache(maxsize=1)
+def _zones() -> dict:
+    """Lower-cased IANA name → canonical name, built once from the local tz database."""
+    try:
+        return {z.lower(): z for z in available_timezones()}
+    except Exception:
+        return {}  # no tz database (e.g. Windows without tzdata) → HTTP only
+
+
+def _resolve_zone(tz: str) -> Optional[str]:
+    return _zones().get(tz.lower().replace(" ", "_"))
+
+
+def _suggest_zones(tz: str, n: int = 3) -> list:
+    zones = _zones()
+    key = tz.lower().replace(" ", "_")
+    matches = difflib.get_close_matches(key, zones.keys(), n=n, cutoff=0.6)
+    if not matches:
+        # "Stockholm" → "Europe/Stockholm": match on the city part alone
+        matches = [k for k in zones if k.rsplit("/", 1)[-1] == key][:n]
+    return [zones[m] for m in matches]
+
+
+def _local_time(zone: str) -> dict:
+    """Same result shape as the timeapi.io path, computed from zoneinfo + system clock."""
+    now = datetime.now(ZoneInfo(zone))
+    offset = now.strftime("%z")
+    return {
+        "ok": True,
+        "timezone": zone,
+        "datetime": now.replace(tzinfo=None).isoformat(timespec="microseconds"),
+        "day_of_week": now.strftime("%A"),
+        "dst_active": bool(now.dst()),
+        "utc_offset": f"{offset[:3]}:{offset[3:]}",
+        "source": "local",
+        "raw": {
+            "year": now.year,
+            "month": now.month,
+            "day": now.day,
+            "hour": now.hour,
+            "minute": now.minute,
+            "seconds": now.second,
+            "milliSeconds": now.microsecond // 1000,
+        },
+    }
+
+
+@tool(GET_TIME_SCHEMA, cache_ttl=GET_TIME_CACHE_TTL)
 def get_time(timezone: str) -> dict:
     """
-    Calls timeapi.io to fetch the current local time for an IANA time zone.
-    Example: https://www.timeapi.io/api/Time/current/zone?timeZone=Europe/Stockholm
-    Returns a compact JSON your model can use.
+    Resolve the current local time for an IANA time zone.
+
+    By default the answer is computed locally with zoneinfo; timeapi.io is
+    only called when TIME_SOURCE=http (authoritative remote clock) or when the
+    zone isn't in the local tz database (an older tzdata may lack new zones).
+    Names timeapi.io doesn't know either get close-match suggestions.
     """
     tz = (timezone or "").strip()
     if not tz:
         return {"ok": False, "timezone": tz, "error": "Empty timezone"}
 
-    url = "https://www.timeapi.io/api/Time/current/zone"
-    try:
-        r = requests.get(url, params={"timeZone": tz}, timeout=10)
-    except Exception as e:
-        return {"ok": False, "timezone": tz, "error": f"Network error: {e}"}
-
-    if r.status_code != 200:
-        # Try to include a small hint from the body if present
-        body = ""
-        try:
-            body = r.text[:200]
-        except Exception:
-            pass
-        return {
-            "ok": False,
-            "timezone": tz,
-            "error": f"HTTP {r.status_code}",
-            "hint": body,
-        }
+    if os.getenv("TIME_SOURCE", "local").lower() == "http":
+        return _http_time(tz)
 
-    try:
-        data = r.json()
-    except Exception as e:
-        return {"ok": False, "timezone": tz, "error": f"Invalid JSON: {e}"}
+    zone = _resolve_zone(tz)
+    if zone:
+        return _local_time(zone)
+    res = _http_time(tz)
+    if not res["ok"]:
+        suggestions = _suggest_zones(tz)
+        if suggestions:
+            res = {**res, "suggestions": suggestions}
+            if "status" in res:  # timeapi.io answered: it doesn't know the zone either
+                res["error"] = f"Unknown IANA timezone '{tz}'"
+    return res
+
+
+def _http_time(tz: str) -> dict:
+    """
+    Calls timeapi.io to fetch the current local time for an IANA time zone.
+    Example: https://www.timeapi.io/api/Time/current/zone?timeZone=Europe/Stockholm
+    Returns a compact JSON your model can use.
+    """
+    # Shared pooled client: retries 5xx/connection errors, fails fast when the host is down.
+    # Imported here so the local (zoneinfo) path never pays for importing requests.
+    from .http_client import get_json
+
+    base = os.getenv("TIMEAPI_BASE_URL", "https://www.timeapi.io")
+    res = get_json(f"{base}/api/Time/current/zone", params={"timeZone": tz})
+    if not res["ok"]:
+        # Includes "error" and, for HTTP errors, a small "hint" from the body
+        return {"ok": False, "timezone": tz, **{k: v for k, v in res.items() if k != "ok"}}
+    data = res["data"]
 
     # timeapi.io fields commonly include:
     # year, month, day, hour, minute, seconds, milliSeconds,
@@ -62,6 +131,7 @@ def get_time(timezone: str) -> dict:
         "datetime": data.get("dateTime"),
         "day_of_week": data.get("dayOfWeek"),
         "dst_active": data.get("dstActive"),
+        "source": "timeapi.io",
         # Keep extras in case you want them later:
         "raw": {
             "year": data.get("year"),
@@ -0,0 +1,223 @@
+# app/tools/validation.py
+"""
+Argument validation for tool calls, compiled from each tool's JSON Schema.
+
+At registry load every spec's `parameters` is turned into a pydantic model
+once. Each dispatch then validates and coerces the model's arguments before
+the tool runs (and before the result-cache lookup):
+
+  * lax coercion: "5" → 5 for integers, " c " → "c", "USD" matches enum "usd"
+  * optional properties fall back to the schema's `default`
+  * violations come back as one compact `ok: false` result naming every bad
+    field, so the model can fix all of them in a single round:
+
+    {"ok": false, "error": "Invalid arguments for get_weather",
+     "errors": ["unit: must be one of 'c', 'f' (got 'k')"]}
+
+Supported keywords: type (incl. type lists), properties, required, enum,
+items, additionalProperties, default, min/maxLength, pattern,
+minimum/maximum (and exclusive*), min/maxItems.
+"""
+import copy
+import functools
+import inspect
+from typing import Annotated, Any, Callable, Dict, List, Literal, Optional, Tuple, Union
+
+from pydantic import BeforeValidator, ConfigDict, Field, ValidationError, create_model, model_validator
+
+MAX_REPORTED_ERRORS = 5
+
+_SCALARS = {"string": str, "integer": int, "number": float, "boolean": bool, "null": type(None)}
+
+
+def _enum_folder(values: tuple) -> Callable:
+    """Map case/space variants of a string enum member onto the member itself."""
+    folded = {v.strip().casefold(): v for v in values if isinstance(v, str)}
+
+    def fold(value):
+        if isinstance(value, str) and value not in values:
+            return folded.get(value.strip().casefold(), value)
+        return value
+
+    return fold
+
+
+def _constraints(schema: dict) -> dict:
+    keys = {
+        "minLength": "min_length", "maxLength": "max_length", "pattern": "pattern",
+        "minimum": "ge", "maximum": "le", "exclusiveMinimum": "gt", "exclusiveMaximum": "lt",
+        "minItems": "min_length", "maxItems": "max_length",
+    }
+    return {keys[k]: v for k, v in schema.items() if k in keys}
+
+
+def _annotation(schema: dict, path: str) -> Any:
+    if "enum" in schema:
+        values = tuple(schema["enum"])
+        return Annotated[Literal[values], BeforeValidator(_enum_folder(values))]
+
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        options = [_annotation({**schema, "type": k}, path) for k in kind]
+        return Union[tuple(options)] if len(options) > 1 else options[0]
+
+    if kind == "object":
+        ann = _object_model(schema, path) if schema.get("properties") else Dict[str, Any]
+    elif kind == "array":
+        ann = List[_annotation(schema.get("items") or {}, path)]
+    else:
+        ann = _SCALARS.get(kind, Any)
+
+    limits = _constraints(schema)
+    return Annotated[ann, Field(**limits)] if limits else ann
+
+
+def _default_filler(defaults: dict) -> Callable:
+    """Before-validator that adds missing defaults to the input, so they count as set (and get dumped)."""
+    def fill(cls, data):
+        if isinstance(data, dict) and any(k not in data for k in defaults):
+            data = {**{k: copy.deepcopy(v) for k, v in defaults.items() if k not in data}, **data}
+        return data
+
+    return model_validator(mode="before")(fill)
+
+
+def _object_model(schema: dict, path: str) -> type:
+    required = set(schema.get("required") or ())
+    fields, defaults = {}, {}
+    for i, (pname, prop) in enumerate((schema.get("properties") or {}).items()):
+        ann = _annotation(prop, f"{path}_{pname}")
+        # Property names can clash with BaseModel attributes (model_config, json, copy, ...):
+        # fields get neutral names and the property name as alias, used for input, errors and output
+        field = f"p{i}"
+        if "default" in prop:
+            # Strict-mode specs list every property as required; a declared default still fills a gap
+            fields[field] = (ann, Field(alias=pname))
+            defaults[pname] = prop["default"]
+        elif pname in required:
+            fields[field] = (ann, Field(alias=pname))
+        else:
+            fields[field] = (Optional[ann], Field(None, alias=pname))
+    extra = "forbid" if schema.get("additionalProperties") is False else "ignore"
+    config = ConfigDict(extra=extra, str_strip_whitespace=True)
+    validators = {"fill_defaults": _default_filler(defaults)} if defaults else None
+    return create_model(path, __config__=config, __validators__=validators, **fields)
+
+
+def _describe(err: dict) -> str:
+    loc = ".".join(str(p) for p in err["loc"]) or "arguments"
+    kind = err["type"]
+    if kind == "missing":
+        return f"{loc}: required"
+    if kind == "extra_forbidden":
+        return f"{loc}: unexpected argument"
+    if kind == "literal_error":
+        allowed = err.get("ctx", {}).get("expected", "")
+        return f"{loc}: must be one of {allowed.replace(' or ', ', ')} (got {err['input']!r})"
+    return f"{loc}: {err['msg'][0].lower()}{err['msg'][1:]} (got {err['input']!r})"
+
+
+class ArgsValidator:
+    """Validates/coerces one tool's arguments; compiled once from its JSON Schema."""
+
+    def __init__(self, name: str, parameters: dict):
+        self.name = name
+        self.model = _object_model(parameters or {"type": "object"}, f"{name}_args")
+
+    def __call__(self, args: Any) -> Tuple[Optional[dict], Optional[dict]]:
+        """Return (clean_args, None) or (None, error_result)."""
+        if not isinstance(args, dict):
+            return None, self.error([f"arguments: expected a JSON object (got {type(args).__name__})"])
+        try:
+            parsed = self.model.model_validate(args)
+        except ValidationError as e:
+            return None, self.error([_describe(err) for err in e.errors(include_url=False)])
+        # Unset optional properties without a default stay absent: the tool's own default applies
+        return parsed.model_dump(by_alias=True, exclude_unset=True), None
+
+    def error(self, problems: List[str]) -> dict:
+        shown = problems[:MAX_REPORTED_ERRORS]
+        if len(problems) > len(shown):
+            shown.append(f"... and {len(problems) - len(shown)} more")
+        return {"ok": False, "error": f"Invalid arguments for {self.name}", "errors": shown}
+
+
+def compile_validators(entries: list) -> dict:
+    """name → ArgsValidator for every manifest entry."""
+    return {e["name"]: ArgsValidator(e["name"], e["spec"].get("parameters")) for e in entries}
+
+
+def with_validation(fn: Callable, validator: ArgsValidator) -> Callable:
+    """Return `fn` taking the model's raw kwargs, validated/coerced first."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def avalidated(**kwargs):
+            clean, error = validator(kwargs)
+            return error if error else await fn(**clean)
+
+        return avalidated
+
+    @functools.wraps(fn)
+    def validated(**kwargs):
+        clean, error = validator(kwargs)
+        return error if error else fn(**clean)
+
+    return validated
+
+
+# ---- structured-output formats (app/schemas/*.json) ---------------------------
+
+_JSON_TYPES = {"object", "array", "string", "number", "integer", "boolean", "null"}
+
+
+def _check_schema(schema: Any, path: str, strict: bool, problems: List[str]) -> None:
+    if not isinstance(schema, dict):
+        problems.append(f"{path}: must be an object")
+        return
+    kinds = schema.get("type")
+    kinds = kinds if isinstance(kinds, list) else [kinds]
+    if "enum" in schema:
+        if not isinstance(schema["enum"], list) or not schema["enum"]:
+            problems.append(f"{path}.enum: must be a non-empty list")
+    elif "anyOf" not in schema and "$ref" not in schema:
+        bad = [k for k in kinds if k not in _JSON_TYPES]
+        if bad:
+            problems.append(f"{path}.type: unknown type {bad[0]!r}")
+    if "object" in kinds:
+        props = schema.get("properties") or {}
+        if strict:
+            if schema.get("additionalProperties") is not False:
+                problems.append(f"{path}: strict mode needs additionalProperties: false")
+            missing = [p for p in props if p not in (schema.get("required") or [])]
+            if missing:
+                problems.append(f"{path}.required: strict mode needs every property listed (missing {missing})")
+        for pname, prop in props.items():
+            _check_schema(prop, f"{path}.properties.{pname}", strict, problems)
+    if "array" in kinds:
+        if "items" not in schema:
+            problems.append(f"{path}: array without 'items'")
+        else:
+            _check_schema(schema["items"], f"{path}.items", strict, problems)
+    for i, option in enumerate(schema.get("anyOf") or []):
+        _check_schema(option, f"{path}.anyOf.{i}", strict, problems)
+
+
+def check_text_format(fmt: Any) -> List[str]:
+    """
+    Problems with a Responses `text.format` object (empty list = usable):
+    {"type": "json_schema", "name": ..., "schema": {...}, "strict": true}
+    """
+    if not isinstance(fmt, dict):
+        return ["format must be a JSON object"]
+    problems = []
+    if fmt.get("type") != "json_schema":
+        problems.append("type: must be 'json_schema'")
+    name = fmt.get("name")
+    if not isinstance(name, str) or not name or len(name) > 64 or not all(c.isalnum() or c in "_-" for c in name):
+        problems.append("name: must be 1-64 letters, digits, '_' or '-'")
+    schema = fmt.get("schema")
+    if not isinstance(schema, dict) or schema.get("type") != "object":
+        problems.append("schema: must be a JSON Schema with type 'object' at the root")
+    else:
+        _check_schema(schema, "schema", fmt.get("strict") is True, problems)
+    return problems
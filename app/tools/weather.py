@@ -1,4 +1,9 @@
-from typing import Literal, TypedDict, Dict
+import os
+from functools import lru_cache
+from typing import Literal, TypedDict, Dict, Tuple
+
+from .place_index import PlaceIndex
+from .registry import tool
 
 # Minimal mock DB so workshop runs without external APIs
 _FAKE_WEATHER: Dict[str, Dict[str, float]] = {
@@ -7,6 +12,13 @@ _FAKE_WEATHER: Dict[str, Dict[str, float]] = {
     "malmo": {"c": 19.0, "f": 66.2},
 }
 
+# Local names, exonyms and common short forms → key in _FAKE_WEATHER
+_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "stockholm": ("Sthlm", "Estocolmo", "Stoccolma"),
+    "gothenburg": ("Göteborg", "Gotenburg", "Gbg", "Gotemburgo"),
+    "malmo": ("Malmö", "Malmoe"),
+}
+
 class GetWeatherArgs(TypedDict):
     city: str
     unit: Literal["c", "f"]
@@ -33,11 +45,76 @@ GET_WEATHER_SCHEMA = {
     "strict": True,
 }
 
+GET_WEATHER_BATCH_SCHEMA = {
+    "name": "get_weather_batch",
+    "description": (
+        "Return the current temperature for MANY cities in one call (mock data). "
+        "Prefer this over repeated get_weather calls."
+    ),
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "requests": {
+                "type": "array",
+                "description": "One entry per city/unit to look up.",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "city": {"type": "string", "description": "City name."},
+                        "unit": {
+                            "type": "string",
+                            "enum": ["c", "f"],
+                            "description": "c for Celsius, f for Fahrenheit",
+                        },
+                    },
+                    "required": ["city", "unit"],
+                    "additionalProperties": False,
+                },
+            }
+        },
+        "required": ["requests"],
+        "additionalProperties": False
+    },
+    "strict": True,
+}
+
+# Mock table never changes → cache results for the life of the cache
+GET_WEATHER_CACHE_TTL = float("inf")
+GET_WEATHER_BATCH_CACHE_TTL = float("inf")
 
-def get_weather(city: str, unit: str = "c") -> dict:
-    c = city.strip().lower()
-    d = _FAKE_WEATHER.get(c)
-    if not d:
+
+@lru_cache(maxsize=1)
+def _index() -> PlaceIndex:
+    """
+    Built once per process. WEATHER_PLACES_FILE (CSV: name,c,f,aliases)
+    adds places on top of the mock table; its index is pickled beside it.
+    """
+    path = os.getenv("WEATHER_PLACES_FILE")
+    index = PlaceIndex.from_csv(path) if path else PlaceIndex()
+    for key, temps in _FAKE_WEATHER.items():
+        index.add({"name": key.title(), **temps}, (key, *_ALIASES.get(key, ())))
+    return index
+
+
+def _lookup(city: str, unit: str) -> dict:
+    if unit not in ("c", "f"):
+        return {"ok": False, "message": f"Unknown unit '{unit}' (use 'c' or 'f')"}
+    record, how = _index().lookup(city)
+    if record is None:
         return {"ok": False, "message": f"No data for '{city}'"}
-    temp = d.get(unit, d["c"])
-    return {"ok": True, "city": city, "unit": unit, "temperature": temp}
+    temp = record[unit]
+    result = {"ok": True, "city": city, "unit": unit, "temperature": temp}
+    if how == "fuzzy" or record["name"].casefold() != city.strip().casefold():
+        result["matched"] = record["name"]  # tell the model which place we used
+    return result
+
+
+@tool(GET_WEATHER_SCHEMA, cache_ttl=GET_WEATHER_CACHE_TTL)
+def get_weather(city: str, unit: str = "c") -> dict:
+    return _lookup(city, unit)
+
+
+@tool(GET_WEATHER_BATCH_SCHEMA, cache_ttl=GET_WEATHER_BATCH_CACHE_TTL)
+def get_weather_batch(requests: list) -> dict:
+    results = [_lookup(r.get("city") or "", r.get("unit") or "c") for r in requests]
+    return {"ok": any(r["ok"] for r in results), "results": results}